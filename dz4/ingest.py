@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import json
+import socket
+import sys
+
+from storage import FSYNC_INTERVAL
+
+SOCKET_HOST = 'localhost'
+SOCKET_PORT = 5000
+QUEUE_SIZE = 50000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.2
+RECV_BUFFER = 4 * 1024 * 1024
+FAILURE_BACKOFF = 1.0
+
+
+def decode_message(data):
+    text = data.decode()
+    if text.startswith('{'):
+        payload = json.loads(text)
+        return str(payload["username"]), str(payload["message"])
+    # Legacy "username|message" datagrams
+    username, message = text.split('|', 1)
+    return username, message
+
+
+class IngestProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ingest):
+        self.ingest = ingest
+
+    def datagram_received(self, data, addr):
+        self.ingest.receive(data)
+
+
+class MessageIngest:
+    """UDP message intake: datagrams go into a bounded queue, a flusher writes them in batches."""
+
+    def __init__(self, storage, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.storage = storage
+        self.queue = asyncio.Queue(queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"received": 0, "invalid": 0, "dropped": 0, "persisted": 0, "failed": 0}
+        self.transport = None
+        self.flusher = None
+        self.closing = False
+
+    async def start(self, host=SOCKET_HOST, port=SOCKET_PORT):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: IngestProtocol(self), local_addr=(host, port)
+        )
+        sock = self.transport.get_extra_info('socket')
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
+        except OSError:
+            pass
+        self.flusher = asyncio.create_task(self.flush_loop())
+
+    async def stop(self):
+        if self.transport is not None:
+            self.transport.close()
+        self.closing = True
+        if self.flusher is not None:
+            await self.flusher
+
+    def receive(self, data):
+        self.stats["received"] += 1
+        try:
+            username, message = decode_message(data)
+        except (ValueError, KeyError, TypeError):
+            self.stats["invalid"] += 1
+            return
+        self.submit(username, message)
+
+    def submit(self, username, message):
+        try:
+            self.queue.put_nowait((str(datetime.datetime.now()), username, message))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        return True
+
+    async def next_batch(self):
+        try:
+            batch = [await asyncio.wait_for(self.queue.get(), FSYNC_INTERVAL)]
+        except asyncio.TimeoutError:
+            return []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self.closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while not (self.closing and self.queue.empty()):
+            batch = await self.next_batch()
+            try:
+                if batch:
+                    await loop.run_in_executor(None, self.storage.append_many, batch)
+                    self.stats["persisted"] += len(batch)
+                else:
+                    await loop.run_in_executor(None, self.storage.sync)
+            except Exception as e:
+                # A failed write (disk full, I/O error) loses this batch but must not stop ingestion
+                self.stats["failed"] += len(batch)
+                print(f"Ingest: failed to persist {len(batch)} messages: {e!r}", file=sys.stderr)
+                if not self.closing:
+                    await asyncio.sleep(FAILURE_BACKOFF)
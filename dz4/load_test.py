@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import time
+
+
+async def client(host, port, path, requests, latencies, errors):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors.append('connect')
+        return
+    request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode()
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n')[1:]:
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Keep-alive load test for the dz4 HTTP server.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=20, help='requests per client')
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, args.path, args.requests, latencies, errors)
+        for _ in range(args.clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    print(f'Clients:   {args.clients}')
+    print(f'Requests:  {len(latencies)} in {elapsed:.2f} s')
+    print(f'Errors:    {len(errors)}')
+    print(f'Req/s:     {len(latencies) / elapsed:.0f}')
+    print(f'Latency:   p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+          f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,13 +1,102 @@
-import http.server
-import socketserver
-import threading
+import asyncio
+import http.client
+import io
 import json
-import socket
-import datetime
+import signal
+import sys
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from static_cache import StaticFileCache, accepts_gzip
+from storage import MessageLog, PAGE_SIZE
+from ingest import MessageIngest
+from sender import MessageSender
+
+HTTP_HOST = ''
+HTTP_PORT = 3000
+KEEPALIVE_TIMEOUT = 5
+SHUTDOWN_TIMEOUT = 5
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 64 * 1024
+BODY_TIMEOUT = 10
+BACKLOG = 2048
+MAX_PAGE_SIZE = 200
+
+static_files = StaticFileCache()
+sender = MessageSender()
+
+
+# HTTP request handler
+class RequestHandler:
+    """One HTTP request/response pair.
+
+    Mirrors the parts of http.server.BaseHTTPRequestHandler the routes use
+    (send_response/send_header/end_headers/wfile), but buffers the response
+    so the asyncio server can add Content-Length and keep the connection open.
+    """
+
+    message_log = None
+
+    def __init__(self, command, path, request_version, headers, body=b''):
+        self.command = command
+        self.path = path
+        self.request_version = request_version
+        self.headers = headers
+        self.rfile = io.BytesIO(body)
+        self.wfile = io.BytesIO()
+        self.status = HTTPStatus.INTERNAL_SERVER_ERROR
+        self.response_headers = []
+
+    def handle(self):
+        method = getattr(self, f'do_{self.command}', None)
+        if method is None:
+            self.send_response(501)
+            self.end_headers()
+            return
+        try:
+            method()
+        except Exception as e:
+            # Drop whatever the route had buffered and answer 500 instead of killing the connection task
+            print(f"HTTP: {self.command} {self.path} failed: {e!r}", file=sys.stderr)
+            self.response_headers = []
+            self.wfile = io.BytesIO()
+            self.send_response(500)
+            self.end_headers()
+
+    def send_response(self, code):
+        self.status = HTTPStatus(code)
+
+    def send_header(self, keyword, value):
+        self.response_headers.append((keyword, str(value)))
+
+    def end_headers(self):
+        pass
+
+    def wants_keep_alive(self):
+        connection = self.headers.get('Connection', '').lower()
+        if self.request_version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def response(self, keep_alive):
+        body = self.wfile.getvalue()
+        lines = [f'HTTP/1.1 {self.status.value} {self.status.phrase}']
+        lines += [f'{key}: {value}' for key, value in self.response_headers]
+        if self.status != HTTPStatus.NOT_MODIFIED:
+            lines.append(f'Content-Length: {len(body)}')
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        head = '\r\n'.join(lines) + '\r\n\r\n'
+        if self.command == 'HEAD':
+            body = b''
+        return head.encode('latin-1') + body
+
+    def do_HEAD(self):
+        self.do_GET()
 
-# HTTP Server Handler
-class RequestHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/messages':
+            self.send_messages(parse_qs(url.query))
+            return
         if self.path == '/':
             self.path = '/index.html'
         elif self.path == '/message':
@@ -18,29 +107,69 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(b"Message sent successfully!")
             return
+        entry = static_files.get(self.path)
+        if entry is None:
+            self.send_static(static_files.get('/error.html'), 404)
+        elif self.not_modified(entry):
+            self.send_response(304)
+            self.send_header('ETag', entry.etag)
+            self.send_header('Last-Modified', entry.last_modified)
+            self.end_headers()
+        else:
+            self.send_static(entry, 200)
+
+    def not_modified(self, entry):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return entry.matches(if_none_match)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        return if_modified_since is not None and not entry.modified_since(if_modified_since)
+
+    def send_static(self, entry, code):
+        use_gzip = entry.gzip_body is not None and accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        self.send_response(code)
+        self.send_header('Content-type', entry.content_type)
+        if code == 200:
+            self.send_header('ETag', entry.gzip_etag if use_gzip else entry.etag)
+            self.send_header('Last-Modified', entry.last_modified)
+            self.send_header('Cache-Control', 'no-cache')
+        if entry.gzip_body is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(entry.gzip_body if use_gzip else entry.body)
+
+    def send_json(self, code, payload):
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def send_messages(self, query):
         try:
-            with open(self.path[1:], 'rb') as file:
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(file.read())
-        except FileNotFoundError:
-            with open('error.html', 'rb') as file:
-                self.send_response(404)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(file.read())
+            limit = int(query.get('limit', [PAGE_SIZE])[0])
+        except ValueError:
+            self.send_json(400, {"error": "limit must be an integer"})
+            return
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+        since = query.get('since', [None])[0]
+        if since is not None:
+            since = since.replace('T', ' ')
+        page = self.message_log.page(since=since, cursor=query.get('cursor', [None])[0], limit=limit)
+        self.send_json(200, page)
 
     def do_POST(self):
-        if self.path == '/send':
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length).decode('utf-8')
-            username = post_data.split('&')[0].split('=')[1]
-            message = post_data.split('&')[1].split('=')[1]
-            data = f"{username}|{message}"
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.sendto(data.encode(), ('localhost', 5000))
-            sock.close()
+        # message.html posts its form to /message
+        if self.path in ('/send', '/message'):
+            try:
+                form = parse_qs(self.rfile.read().decode('utf-8'), keep_blank_values=True)
+            except UnicodeDecodeError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            sender.send(form.get('username', [''])[0], form.get('message', [''])[0])
             self.send_response(302)
             self.send_header('Location', '/send')
             self.end_headers()
@@ -48,33 +177,113 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
             self.send_response(404)
             self.end_headers()
 
-# Socket Server
-def socket_server():
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(('localhost', 5000))
-    while True:
-        data, addr = sock.recvfrom(1024)
-        message_data = data.decode().split('|')
-        timestamp = str(datetime.datetime.now())
-        message_dict = {timestamp: {"username": message_data[0], "message": message_data[1]}}
+
+class BadRequest(Exception):
+    """A request read_request() rejects; answered with status and the connection closed."""
+
+    def __init__(self, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(status)
+        self.status = HTTPStatus(status)
+
+
+# Async HTTP server
+class HTTPServer:
+    def __init__(self, host=HTTP_HOST, port=HTTP_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self.closing = False
+        self.connections = set()
+        self.idle = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE, backlog=BACKLOG
+        )
+
+    async def read_request(self, reader):
+        task = asyncio.current_task()
+        self.idle.add(task)
         try:
-            with open('storage/data.json', 'r') as f:
-                existing_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            existing_data = {}
-        existing_data.update(message_dict)
-        with open('storage/data.json', 'w') as f:
-            json.dump(existing_data, f, indent=2)
-
-# Start servers in threads
-httpd = socketserver.TCPServer(('', 3000), RequestHandler)
-thread_http = threading.Thread(target=httpd.serve_forever)
-thread_http.daemon = True
-thread_http.start()
-
-thread_socket = threading.Thread(target=socket_server)
-thread_socket.daemon = True
-thread_socket.start()
-
-thread_http.join()
-thread_socket.join()
\ No newline at end of file
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+        finally:
+            self.idle.discard(task)
+        request_line, _, header_block = head.partition(b'\r\n')
+        try:
+            command, path, request_version = request_line.decode('latin-1').split()
+            headers = http.client.parse_headers(io.BytesIO(header_block))
+            content_length = int(headers.get('Content-Length') or 0)
+        except (ValueError, http.client.HTTPException):  # HTTPException: too many or too long headers
+            raise BadRequest()
+        if content_length < 0:
+            raise BadRequest()
+        if content_length > MAX_BODY_SIZE:
+            raise BadRequest(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await asyncio.wait_for(reader.readexactly(content_length), BODY_TIMEOUT) if content_length else b''
+        return RequestHandler(command, path, request_version, headers, body)
+
+    async def handle_connection(self, reader, writer):
+        self.connections.add(asyncio.current_task())
+        try:
+            while not self.closing:
+                try:
+                    handler = await self.read_request(reader)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ConnectionError):
+                    break
+                except BadRequest as e:
+                    writer.write(f'HTTP/1.1 {e.status.value} {e.status.phrase}\r\n'
+                                 f'Content-Length: 0\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+                    break
+                handler.handle()
+                keep_alive = handler.wants_keep_alive() and not self.closing
+                writer.write(handler.response(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections.discard(asyncio.current_task())
+            writer.close()
+
+    async def shutdown(self):
+        self.closing = True
+        self.server.close()
+        # Idle keep-alive connections are dropped now, busy ones finish their current response
+        for task in list(self.idle):
+            task.cancel()
+        if self.connections:
+            _, pending = await asyncio.wait(self.connections, timeout=SHUTDOWN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+        await self.server.wait_closed()
+
+
+async def main():
+    storage = MessageLog()
+    RequestHandler.message_log = storage
+    ingest = MessageIngest(storage)
+    await ingest.start()
+    sender.local = ingest
+
+    httpd = HTTPServer()
+    await httpd.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+    await stop.wait()
+    await httpd.shutdown()
+    sender.local = None
+    await ingest.stop()
+    storage.close()
+    print(f"Ingest: {ingest.stats}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
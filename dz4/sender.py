@@ -0,0 +1,119 @@
+import asyncio
+import collections
+import json
+import socket
+import threading
+
+from ingest import SOCKET_HOST, SOCKET_PORT
+
+PENDING_LIMIT = 10000
+RETRY_INTERVAL = 0.5
+
+
+def encode_message(username, message):
+    return json.dumps({"username": username, "message": message}, ensure_ascii=False).encode()
+
+
+class MessageSender:
+    """Delivers submitted messages to the socket server.
+
+    When the ingest endpoint runs in the same process, messages are queued
+    to it directly. Otherwise a single connected UDP socket is reused.
+    UDP gives no delivery receipt: a refusal (ICMP port unreachable) only
+    shows up as a pending socket error after the datagram was sent. So sent
+    messages stay in `unconfirmed` until a later flush finds no error on the
+    socket; if it finds one, they go back to the front of `pending` and the
+    socket is reopened. While anything is pending or unconfirmed, flush()
+    re-runs on a timer, so messages are retried without new submissions.
+    Delivery is at-least-once: a refusal resends the whole unconfirmed window.
+    Messages that no longer fit in `pending` are dropped and counted in stats.
+    """
+
+    def __init__(self, address=(SOCKET_HOST, SOCKET_PORT), local=None, pending_limit=PENDING_LIMIT,
+                 retry_interval=RETRY_INTERVAL):
+        self.address = address
+        self.local = local
+        self.retry_interval = retry_interval
+        self.sock = None
+        self.pending = collections.deque(maxlen=pending_limit)
+        self.unconfirmed = collections.deque()
+        self.retry = None
+        self.stats = {"dropped": 0}
+        self.lock = threading.RLock()  # the fallback retry timer runs on another thread
+
+    def send(self, username, message):
+        if self.local is not None:
+            return self.local.submit(username, message)
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.stats["dropped"] += 1  # the oldest pending message falls off the deque
+            self.pending.append(encode_message(username, message))
+            self._flush()
+        return True
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _retry(self):
+        with self.lock:
+            self.retry = None
+            self._flush()
+
+    def _requeue(self):
+        # Back to the front of pending; whatever overflows maxlen is lost from the newest end
+        overflow = len(self.pending) + len(self.unconfirmed) - self.pending.maxlen
+        self.stats["dropped"] += max(overflow, 0)
+        self.pending.extendleft(reversed(self.unconfirmed))
+        self.unconfirmed.clear()
+
+    def _flush(self):
+        if self.refused():
+            # Everything sent since the last clean check may have been lost
+            self._requeue()
+            self.close()
+        else:
+            self.unconfirmed.clear()
+            while self.pending:
+                try:
+                    self.socket().send(self.pending[0])
+                except BlockingIOError:
+                    break
+                except OSError:
+                    # ECONNREFUSED from a previous datagram: the socket server is down
+                    self._requeue()
+                    self.close()
+                    break
+                self.unconfirmed.append(self.pending.popleft())
+        if self.pending or self.unconfirmed:
+            self.schedule_retry()
+
+    def refused(self):
+        if self.sock is None:
+            return False
+        # Reading SO_ERROR also clears it
+        return self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0
+
+    def schedule_retry(self):
+        # At most one timer: it is only cleared by _retry when it fires
+        if self.retry is not None:
+            return
+        try:
+            self.retry = asyncio.get_running_loop().call_later(self.retry_interval, self._retry)
+        except RuntimeError:
+            # Used outside the event loop: retry from a timer thread instead
+            self.retry = threading.Timer(self.retry_interval, self._retry)
+            self.retry.daemon = True
+            self.retry.start()
+
+    def socket(self):
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.setblocking(False)
+            self.sock.connect(self.address)
+        return self.sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
@@ -0,0 +1,105 @@
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+import time
+from urllib.parse import unquote, urlsplit
+
+CHECK_INTERVAL = 1.0
+GZIP_MIN_SIZE = 512
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class StaticFile:
+    def __init__(self, body, mtime_ns, size, content_type, gzip_body=None):
+        self.body = body
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.content_type = content_type
+        self.gzip_body = gzip_body
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.last_modified = email.utils.formatdate(mtime_ns / 1e9, usegmt=True)
+        self.checked_at = time.monotonic()
+
+    def matches(self, if_none_match):
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return self.etag in tags or self.gzip_etag in tags
+
+    def modified_since(self, if_modified_since):
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return True
+        return int(self.mtime_ns / 1e9) > since
+
+
+class StaticFileCache:
+    """In-memory cache of static files, revalidated by mtime at most every check_interval seconds."""
+
+    def __init__(self, root='.', check_interval=CHECK_INTERVAL, compress=True):
+        self.root = os.path.realpath(root)
+        self.check_interval = check_interval
+        self.compress = compress
+        self.entries = {}
+
+    def resolve(self, url_path):
+        path = unquote(urlsplit(url_path).path)
+        fs_path = os.path.realpath(os.path.join(self.root, path.lstrip('/')))
+        if os.path.commonpath([self.root, fs_path]) != self.root:
+            return None
+        return fs_path
+
+    def get(self, url_path):
+        fs_path = self.resolve(url_path)
+        if fs_path is None:
+            return None
+        entry = self.entries.get(fs_path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry
+        try:
+            st = os.stat(fs_path)
+        except OSError:
+            self.entries.pop(fs_path, None)
+            return None
+        if entry is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+            entry.checked_at = now
+            return entry
+        entry = self.load(fs_path, st)
+        self.entries[fs_path] = entry
+        return entry
+
+    def load(self, fs_path, st):
+        try:
+            with open(fs_path, 'rb') as file:
+                body = file.read()
+        except IsADirectoryError:
+            return None
+        content_type = mimetypes.guess_type(fs_path)[0] or 'application/octet-stream'
+        return StaticFile(body, st.st_mtime_ns, st.st_size, content_type, self.load_gzip(fs_path, st, body, content_type))
+
+    def load_gzip(self, fs_path, st, body, content_type):
+        # Prefer a precompressed file.gz next to the original if it is up to date
+        try:
+            gz_st = os.stat(fs_path + '.gz')
+            if gz_st.st_mtime_ns >= st.st_mtime_ns:
+                with open(fs_path + '.gz', 'rb') as file:
+                    return file.read()
+        except OSError:
+            pass
+        if self.compress and len(body) >= GZIP_MIN_SIZE and content_type.startswith(COMPRESSIBLE_TYPES):
+            return gzip.compress(body, mtime=0)
+        return None
+
+
+def accepts_gzip(accept_encoding):
+    for token in accept_encoding.split(','):
+        name, _, params = token.strip().partition(';')
+        if name.strip().lower() == 'gzip':
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
@@ -0,0 +1,215 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+DATA_FILE = 'storage/data.json'
+LOG_FILE = 'storage/messages.jsonl'
+FSYNC_EVERY = 100
+FSYNC_INTERVAL = 1.0
+COMPACT_EVERY = 10000
+PAGE_SIZE = 50
+SEALED_SUFFIX = '.sealed'
+
+
+class MessageLog:
+    """Append-only JSON Lines message log.
+
+    Each message costs one appended line; fsync is batched by count and
+    time. Every compact_every messages the log is sealed (renamed to
+    messages.jsonl.sealed) and a fresh one started; a background thread then
+    folds the sealed segment into the legacy data.json
+    ({timestamp: {"username", "message"}}) without holding the write lock,
+    so a flush never pays for the whole history. Reads are served from an
+    in-memory index ordered by timestamp. The index has its own short lock,
+    so page() (called on the event loop) never waits for a writer's fsync.
+    """
+
+    def __init__(self, data_file=DATA_FILE, log_file=LOG_FILE, fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL, compact_every=COMPACT_EVERY):
+        self.data_file = data_file
+        self.log_file = log_file
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.sealed_file = log_file + SEALED_SUFFIX
+        self.lock = threading.Lock()
+        self.index_lock = threading.Lock()
+        self.merge_lock = threading.Lock()
+        self.merger = None
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        self.timestamps = []
+        self.entries = []
+        self.logged = self.load_index()
+        self.file = open(log_file, 'a', encoding='utf-8')
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        if os.path.exists(self.sealed_file):  # sealed before a crash, never merged
+            self._start_merge()
+
+    def append(self, timestamp, username, message):
+        self.append_many([(timestamp, username, message)])
+
+    def append_many(self, messages):
+        with self.lock:
+            self.file.write(''.join(
+                json.dumps({"timestamp": timestamp, "username": username, "message": message},
+                           ensure_ascii=False) + '\n'
+                for timestamp, username, message in messages
+            ))
+            self.file.flush()
+            with self.index_lock:
+                for entry in messages:
+                    self.index(*entry)
+            self.unsynced += len(messages)
+            self.logged += len(messages)
+            if self.unsynced >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._sync()
+            if self.logged >= self.compact_every and self._rotate():
+                self._start_merge()
+
+    def page(self, since=None, cursor=None, limit=PAGE_SIZE):
+        """Messages after since/cursor (exclusive) in timestamp order; the latest ones if neither is given.
+
+        The cursor is "timestamp|n", the n-th message with that timestamp, so
+        messages sharing a timestamp across a page boundary are not skipped.
+        A bare timestamp cursor works like since.
+        """
+        with self.index_lock:
+            if since is None and cursor is None:
+                start = max(len(self.timestamps) - limit, 0)
+            else:
+                start = max(self.position_after(since), self.position_after(cursor))
+            items = self.entries[start:start + limit]
+            has_more = start + limit < len(self.entries)
+            if items:
+                last = start + len(items) - 1
+                timestamp = items[-1][0]
+                next_cursor = f'{timestamp}|{last - bisect.bisect_left(self.timestamps, timestamp)}'
+            else:
+                next_cursor = cursor or since
+        return {
+            "messages": [
+                {"timestamp": timestamp, "username": username, "message": message}
+                for timestamp, username, message in items
+            ],
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+        }
+
+    def position_after(self, cursor):
+        if not cursor:
+            return 0
+        timestamp, sep, n = cursor.rpartition('|')
+        if not sep or not n.isdigit():
+            return bisect.bisect_right(self.timestamps, cursor)
+        first = bisect.bisect_left(self.timestamps, timestamp)
+        return min(first + int(n) + 1, bisect.bisect_right(self.timestamps, timestamp))
+
+    def sync(self):
+        with self.lock:
+            if self.unsynced:
+                self._sync()
+
+    def compact(self):
+        """Fold everything logged so far into data.json, waiting for any background merge."""
+        with self.merge_lock:
+            self._merge_sealed()
+            with self.lock:
+                rotated = self._rotate()
+            if rotated:
+                self._merge_sealed()
+
+    def close(self):
+        self.compact()
+        with self.lock:
+            self.file.close()
+
+    def read_log(self, path=None):
+        try:
+            with open(path or self.log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line after a crash
+        except FileNotFoundError:
+            return
+
+    def read_data(self):
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def load_index(self):
+        data = self.read_data()
+        for timestamp, entry in data.items():
+            self.index(timestamp, entry["username"], entry["message"])
+        for entry in self.read_log(self.sealed_file):
+            if entry["timestamp"] not in data:  # already merged before a crash
+                self.index(entry["timestamp"], entry["username"], entry["message"])
+        logged = 0
+        for entry in self.read_log():
+            logged += 1
+            if entry["timestamp"] not in data:
+                self.index(entry["timestamp"], entry["username"], entry["message"])
+        return logged
+
+    def index(self, timestamp, username, message):
+        # Timestamps are str(datetime.now()), so they sort lexicographically
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            position = len(self.timestamps)
+        else:
+            position = bisect.bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(position, timestamp)
+        self.entries.insert(position, (timestamp, username, message))
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def _rotate(self):
+        """Seal the current log and start a new one; called with self.lock held.
+
+        Only one sealed segment exists at a time: while it is still being
+        merged the current log just keeps growing.
+        """
+        if self.logged == 0 or os.path.exists(self.sealed_file):
+            return False
+        self.file.flush()
+        self._sync()
+        self.file.close()
+        os.replace(self.log_file, self.sealed_file)
+        self.file = open(self.log_file, 'a', encoding='utf-8')
+        self.logged = 0
+        return True
+
+    def _start_merge(self):
+        self.merger = threading.Thread(target=self._background_merge, name='message-log-merge')
+        self.merger.start()
+
+    def _background_merge(self):
+        with self.merge_lock:
+            self._merge_sealed()
+
+    def _merge_sealed(self):
+        # Runs without self.lock: appends continue into the new log meanwhile.
+        # The index already holds data.json and the sealed segment; dumping a
+        # snapshot of it avoids json.load, which holds the GIL for the whole parse.
+        if not os.path.exists(self.sealed_file):
+            return
+        with self.index_lock:
+            entries = self.entries[:]
+        data = {timestamp: {"username": username, "message": message} for timestamp, username, message in entries}
+        tmp_file = self.data_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+        # data.json already holds the segment, so a crash before the unlink only replays the same keys
+        os.remove(self.sealed_file)
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import random
+import time
+
+from exchange.broadcast import Broadcaster
+
+
+class SimulatedClient:
+    """Stands in for a websocket: send() takes `delay` seconds, close() just marks it closed."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = 0
+        self.closed = False
+
+    async def send(self, message):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code=1000, reason=""):
+        self.closed = True
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Broadcast fan-out simulation for the dz5 chat server.")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--slow", type=float, default=0.01, help="share of slow clients")
+    parser.add_argument("--send-delay", type=float, default=0.0, help="max send time of a normal client, s")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between broadcasts")
+    parser.add_argument("--queue-size", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    clients = [
+        SimulatedClient(1.0 if rng.random() < args.slow else rng.uniform(0, args.send_delay))
+        for _ in range(args.clients)
+    ]
+    broadcaster = Broadcaster(queue_size=args.queue_size)
+    for client in clients:
+        broadcaster.register(client)
+
+    start = time.perf_counter()
+    for i in range(args.messages):
+        broadcaster.broadcast({"message": f"sim: message {i}"})
+        await asyncio.sleep(args.interval)
+    while any(queue.qsize() for queue in broadcaster.queues.values()):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(args.send_delay + 0.01)  # let the last in-progress sends finish
+    elapsed = time.perf_counter() - start
+
+    stats = broadcaster.summary()
+    fast = [c for c in clients if not c.closed]
+    print(f"Clients:          {args.clients} ({args.clients - len(fast)} evicted)")
+    print(f"Broadcasts:       {stats['broadcasts']} in {elapsed:.2f} s")
+    print(f"Delivered:        {stats['sent']}")
+    print(f"Complete clients: {sum(c.received == args.messages for c in fast)} / {len(fast)}")
+    print(f"Fan-out:          last {stats['last_fanout_s'] * 1000:.2f} ms, max {stats['max_fanout_s'] * 1000:.2f} ms")
+    print(f"Delivery latency: avg {stats['avg_delivery_s'] * 1000:.2f} ms, max {stats['max_delivery_s'] * 1000:.2f} ms")
+
+    for client in list(broadcaster.queues):
+        broadcaster.unregister(client)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+import bisect
+import math
+from array import array
+from datetime import date as date_type
+
+FIELDS = ("purchase", "sale")
+DATE_FORMAT = "%d.%m.%Y"
+
+
+def rate_value(entry: dict, field: str) -> float:
+    value = entry.get(f"{field}Rate", entry.get(f"{field}RateNB"))
+    return math.nan if value is None else float(value)
+
+
+class RateSeriesStore:
+    """Columnar in-memory store of daily rates.
+
+    One sorted axis of date ordinals plus an array('d') column per
+    (currency, field); a currency missing on some day holds NaN there.
+    Range queries are two bisects and column slices.
+    """
+
+    def __init__(self):
+        self.days = []
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, day: date_type) -> bool:
+        i = bisect.bisect_left(self.days, day.toordinal())
+        return i < len(self.days) and self.days[i] == day.toordinal()
+
+    def add(self, day: date_type, data: dict):
+        ordinal = day.toordinal()
+        i = bisect.bisect_left(self.days, ordinal)
+        if i == len(self.days) or self.days[i] != ordinal:
+            self.days.insert(i, ordinal)
+            for column in self.columns.values():
+                column.insert(i, math.nan)
+        for entry in data.get("exchangeRate", []):
+            currency = entry.get("currency")
+            if not currency:
+                continue
+            for field in FIELDS:
+                column = self.columns.get((currency, field))
+                if column is None:
+                    column = self.columns[(currency, field)] = array("d", [math.nan]) * len(self.days)
+                column[i] = rate_value(entry, field)
+
+    def query(self, start: date_type, end: date_type, currencies) -> dict:
+        lo = bisect.bisect_left(self.days, start.toordinal())
+        hi = bisect.bisect_right(self.days, end.toordinal())
+        days = self.days[lo:hi]
+        result = {}
+        for currency in sorted(set(currencies)):
+            series = {field: self.columns.get((currency, field), array("d"))[lo:hi] for field in FIELDS}
+            if not any(series[field] for field in FIELDS):
+                continue
+            result[currency] = {field: summarize(series[field]) for field in FIELDS}
+            result[currency]["days"] = daily_changes(days, series)
+        return result
+
+
+def summarize(values) -> dict:
+    present = [v for v in values if not math.isnan(v)]
+    if not present:
+        return {"min": None, "max": None, "avg": None, "change": None}
+    return {
+        "min": min(present),
+        "max": max(present),
+        "avg": round(sum(present) / len(present), 4),
+        "change": round(present[-1] - present[0], 4),
+    }
+
+
+def daily_changes(days, series) -> list:
+    rows = []
+    previous = {field: math.nan for field in FIELDS}
+    for i, ordinal in enumerate(days):
+        row = {"date": date_type.fromordinal(ordinal).strftime(DATE_FORMAT)}
+        for field in FIELDS:
+            value = series[field][i] if i < len(series[field]) else math.nan
+            if math.isnan(value):
+                row[field] = row[f"{field}_change"] = None
+                continue
+            row[field] = value
+            row[f"{field}_change"] = None if math.isnan(previous[field]) else round(value - previous[field], 4)
+            previous[field] = value
+        rows.append(row)
+    return rows
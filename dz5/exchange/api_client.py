@@ -1,16 +1,146 @@
+import asyncio
 import aiohttp
-from .exceptions import APIClientError
+from .exceptions import APIClientError, CircuitOpenError, TransientAPIError
+from .resilience import CircuitBreaker, RateLimiter, RetryPolicy
+
+CONNECTION_LIMIT = 20
+CONNECTIONS_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 10
 
 class PrivatBankAPIClient:
+    """PrivatBank archive client with one long-lived, pooled aiohttp session.
+
+    Use it as an async context manager (or call close()) so the session and
+    its keep-alive connections are released. An optional RateCache is
+    consulted before every request and filled after it. Concurrent calls for
+    the same date share one in-flight fetch.
+
+    Upstream requests go through a token-bucket rate limiter and are retried
+    on transient errors with jittered exponential backoff. Repeated failures
+    open a circuit breaker; while it is open (or when retries run out) stale
+    cached data is served if there is any.
+    """
+
     BASE_URL = "https://api.privatbank.ua/p24api/exchange_rates?json&date={date}"
 
-    async def fetch_rates_for_date(self, date: str):
-        url = self.BASE_URL.format(date=date)
+    def __init__(self, base_url=BASE_URL, limit=CONNECTION_LIMIT, limit_per_host=CONNECTIONS_PER_HOST,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT, timeout=REQUEST_TIMEOUT, cache=None,
+                 retry=None, breaker=None, rate_limiter=None):
+        self.base_url = base_url
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.coalesced = 0
+        self._session = None
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self):
+        # Created lazily: aiohttp sessions must be built inside a running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch_rates_for_date(self, date: str, use_cache=True):
+        """use_cache=False skips the cache lookup (the response is still stored)."""
+        key = (date, use_cache)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_rates(date, use_cache))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one cancelled caller must not cancel the fetch the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _fetch_rates(self, date: str, use_cache=True):
+        # One cache read serves both the freshness check and the stale fallback,
+        # and is counted once in the cache stats with whatever it ended up as.
+        entry = None
+        if self.cache is not None and use_cache:
+            entry = await self.cache.lookup(date)
+            if entry is not None and entry.fresh:
+                self.cache.count(entry, served=True)
+                return entry.data
+        if not self.breaker.allow():
+            return await self.stale_or_raise(
+                date, CircuitOpenError("API тимчасово недоступне, спробуйте пізніше"), entry, looked_up=use_cache
+            )
+        try:
+            data = await self.request_with_retries(date)
+        except TransientAPIError as e:
+            self.breaker.record_failure()
+            return await self.stale_or_raise(date, e, entry, looked_up=use_cache)
+        except APIClientError:
+            # Upstream answered (e.g. 404 for a bad date): not an outage, so it
+            # doesn't count towards the breaker and closes it after a half-open trial
+            self.breaker.record_success()
+            self.count_miss(entry, use_cache)
+            raise
+        self.breaker.record_success()
+        self.count_miss(entry, use_cache)
+        if self.cache is not None:
+            await self.cache.set(date, data)
+        return data
+
+    def count_miss(self, entry, looked_up):
+        if self.cache is not None and looked_up:
+            self.cache.count(entry, served=False)
+
+    async def stale_or_raise(self, date: str, error: APIClientError, entry=None, looked_up=False):
+        if self.cache is not None:
+            if not looked_up:
+                entry = await self.cache.lookup(date)
+            self.cache.count(entry, served=entry is not None)
+            if entry is not None:
+                return entry.data
+        raise error
+
+    async def request_with_retries(self, date: str):
+        for attempt in range(self.retry.retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                return await self.request_rates(date)
+            except TransientAPIError:
+                if attempt == self.retry.retries:
+                    raise
+            await asyncio.sleep(self.retry.delay(attempt))
+
+    async def request_rates(self, date: str):
+        url = self.base_url.format(date=date)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as response:
-                    if response.status != 200:
-                        raise APIClientError(f"Помилка API: {response.status}")
-                    return await response.json()
+            async with self.session.get(url) as response:
+                if response.status == 429 or response.status >= 500:
+                    raise TransientAPIError(f"Помилка API: {response.status}")
+                if response.status != 200:
+                    raise APIClientError(f"Помилка API: {response.status}")
+                return await response.json()
+        except APIClientError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransientAPIError(f"Не вдалося отримати дані: {e!r}")
         except Exception as e:
             raise APIClientError(f"Не вдалося отримати дані: {e}")
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+import websockets
+
+QUEUE_SIZE = 100
+
+
+class Broadcaster:
+    """Fan-out of chat messages to connected websockets.
+
+    A message is JSON-encoded once and put on every client's bounded queue;
+    each client has its own sender task, so a slow client only backs up its
+    own queue. A client whose queue is full is evicted.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.queues = {}
+        self.senders = {}
+        self.closers = set()  # evictions in progress; asyncio only keeps weak references to tasks
+        self.stats = {
+            "broadcasts": 0,
+            "queued": 0,
+            "sent": 0,
+            "evicted": 0,
+            "last_fanout_s": 0.0,
+            "max_fanout_s": 0.0,
+            "delivery_total_s": 0.0,
+            "max_delivery_s": 0.0,
+        }
+
+    def __len__(self):
+        return len(self.queues)
+
+    def register(self, websocket):
+        queue = asyncio.Queue(self.queue_size)
+        self.queues[websocket] = queue
+        self.senders[websocket] = asyncio.create_task(self._sender(websocket, queue))
+
+    def unregister(self, websocket):
+        self.queues.pop(websocket, None)
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.cancel()
+
+    def broadcast(self, payload):
+        message = json.dumps(payload)
+        start = time.perf_counter()
+        for websocket in list(self.queues):
+            self.deliver(websocket, message, start)
+        elapsed = time.perf_counter() - start
+        self.stats["broadcasts"] += 1
+        self.stats["queued"] += len(self.queues)
+        self.stats["last_fanout_s"] = elapsed
+        self.stats["max_fanout_s"] = max(self.stats["max_fanout_s"], elapsed)
+
+    def deliver(self, websocket, message: str, queued_at=None):
+        """Queue an already encoded message for one client; evicts the client if its queue is full."""
+        queue = self.queues.get(websocket)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait((message, queued_at or time.perf_counter()))
+        except asyncio.QueueFull:
+            self.evict(websocket)
+
+    def evict(self, websocket):
+        self.unregister(websocket)
+        self.stats["evicted"] += 1
+        closer = asyncio.create_task(websocket.close(code=1008, reason="slow consumer"))
+        self.closers.add(closer)
+        closer.add_done_callback(self.closers.discard)
+
+    def summary(self):
+        sent = self.stats["sent"]
+        return {
+            **self.stats,
+            "clients": len(self.queues),
+            "avg_delivery_s": self.stats["delivery_total_s"] / sent if sent else 0.0,
+        }
+
+    async def _sender(self, websocket, queue):
+        while True:
+            message, queued_at = await queue.get()
+            try:
+                await websocket.send(message)
+            except websockets.ConnectionClosed:
+                self.unregister(websocket)
+                return
+            latency = time.perf_counter() - queued_at
+            self.stats["sent"] += 1
+            self.stats["delivery_total_s"] += latency
+            self.stats["max_delivery_s"] = max(self.stats["max_delivery_s"], latency)
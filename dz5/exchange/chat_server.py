@@ -1,38 +1,95 @@
 import asyncio
+import functools
 import websockets
 import json
-from datetime import datetime
+import time
+from dz5.exchange.api_client import PrivatBankAPIClient
+from dz5.exchange.broadcast import Broadcaster
+from dz5.exchange.command_log import CommandLogWriter
 from dz5.exchange.currency_service import CurrencyService
-from aiofile import async_open
-from aiopath import AsyncPath
+from dz5.exchange.rate_cache import RateCache
+from dz5.exchange.subscriptions import RateSubscriptions
 
-connected_clients = set()
+RESPONSE_TTL = 60
+RESPONSE_CACHE_SIZE = 1024
 
-async def log_exchange_command(command: str, client: str):
-    log_file = AsyncPath("exchange_commands.log")
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] Client {client} executed: {command}\n"
-    async with async_open(log_file, "a") as f:
-        await f.write(log_entry)
+broadcaster = Broadcaster()
+command_log = CommandLogWriter()
+
+
+class ResponseCache:
+    """Formatted exchange replies keyed by (days, currencies).
+
+    Concurrent misses for the same key share one computation; only replies
+    without per-day errors are kept, for ttl seconds.
+    """
+
+    def __init__(self, ttl=RESPONSE_TTL, max_size=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = {}
+        self.inflight = {}
+
+    async def get(self, key, compute):
+        entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        value, _ = await asyncio.shield(task)
+        return value
+
+    def _store(self, key, task):
+        self.inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        value, cacheable = task.result()
+        if cacheable:
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.max_size:
+                self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = (time.monotonic(), value)
+
+
+response_cache = ResponseCache()
 
 async def format_rates(rates):
     formatted = []
     for day in rates:
         for date, currencies in day.items():
             formatted.append(f"Дата: {date}")
+            if "error" in currencies:
+                formatted.append(f"  Помилка: {currencies['error']}")
+                continue
             for currency, data in currencies.items():
                 formatted.append(f"  {currency}: Купівля: {data['purchase']}, Продаж: {data['sale']}")
     return "\n".join(formatted)
 
-async def handle_connection(websocket):
+async def exchange_response(days, currencies, api_client):
+    service = CurrencyService(currencies=currencies, client=api_client)
+    rates = await service.get_exchange_rates(days)
+    complete = all("error" not in currencies for day in rates for currencies in day.values())
+    return await format_rates(rates), complete
+
+async def handle_connection(websocket, api_client, subscriptions):
     client = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-    connected_clients.add(websocket)
+    broadcaster.register(websocket)
     try:
         async for message in websocket:
             try:
                 data = json.loads(message)
                 command = data.get("command", "").strip()
-                if command.startswith("exchange"):
+                if command.startswith("subscribe"):
+                    currencies = command.split()[1:] or ["USD", "EUR"]
+                    subscriptions.subscribe(websocket, currencies)
+                    await websocket.send(json.dumps({"message": f"Підписка на {', '.join(currencies)} оформлена"}))
+                elif command.startswith("unsubscribe"):
+                    subscriptions.unsubscribe(websocket)
+                    await websocket.send(json.dumps({"message": "Підписку скасовано"}))
+                elif command.startswith("exchange"):
                     parts = command.split()
                     days = 1
                     currencies = ["USD", "EUR"]
@@ -46,26 +103,39 @@ async def handle_connection(websocket):
                         except ValueError:
                             await websocket.send(json.dumps({"error": "Неправильний формат кількості днів"}))
                             continue
-                    await log_exchange_command(command, client)
-                    service = CurrencyService(currencies=currencies)
-                    rates = await service.get_exchange_rates(days)
-                    response = await format_rates(rates)
+                    command_log.log(command, client)
+                    key = (days, tuple(sorted(set(currencies))))
+                    response = await response_cache.get(
+                        key, functools.partial(exchange_response, days, currencies, api_client)
+                    )
                     await websocket.send(json.dumps({"message": response}))
                 else:
                     # Broadcast regular messages
-                    response = {"message": f"{client}: {data.get('message', '')}"}
-                    await asyncio.gather(
-                        *[client.send(json.dumps(response)) for client in connected_clients]
-                    )
+                    broadcaster.broadcast({"message": f"{client}: {data.get('message', '')}"})
             except json.JSONDecodeError:
                 await websocket.send(json.dumps({"error": "Неправильний формат повідомлення"}))
     except websockets.ConnectionClosed:
         pass
     finally:
-        connected_clients.remove(websocket)
+        subscriptions.unsubscribe(websocket)
+        broadcaster.unregister(websocket)
+
+async def main(host="localhost", port=8765, api_client=None):
+    command_log.start()
+    try:
+        if api_client is not None:
+            await serve(api_client, host, port)
+            return
+        with RateCache() as cache:
+            async with PrivatBankAPIClient(cache=cache) as api_client:
+                await serve(api_client, host, port)
+    finally:
+        await command_log.stop()
 
-async def main():
-    server = await websockets.serve(handle_connection, "localhost", 8765)
+async def serve(api_client, host, port):
+    subscriptions = RateSubscriptions(api_client, broadcaster)
+    handler = functools.partial(handle_connection, api_client=api_client, subscriptions=subscriptions)
+    server = await websockets.serve(handler, host, port)
     await server.wait_closed()
 
 if __name__ == "__main__":
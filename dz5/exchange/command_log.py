@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+from aiofile import async_open
+from aiopath import AsyncPath
+
+LOG_FILE = "exchange_commands.log"
+QUEUE_SIZE = 10000
+BATCH_SIZE = 256
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 3
+
+
+class CommandLogWriter:
+    """Background writer for the exchange command log.
+
+    log() only formats the entry and puts it on a queue; a single task
+    writes queued entries in batches to one open file, rotates it by size
+    (file.1 ... file.N) and flushes whatever is left on stop().
+    """
+
+    def __init__(self, path=LOG_FILE, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+        self.path = path
+        self.queue = asyncio.Queue(queue_size)
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.size = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    def log(self, command: str, client: str):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.queue.put_nowait(f"[{timestamp}] Client {client} executed: {command}\n")
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _open(self):
+        path = AsyncPath(self.path)
+        self.size = (await path.stat()).st_size if await path.exists() else 0
+        return await async_open(self.path, "a")
+
+    async def _rotate(self):
+        await AsyncPath(f"{self.path}.{self.backup_count}").unlink(missing_ok=True)
+        for i in range(self.backup_count - 1, 0, -1):
+            backup = AsyncPath(f"{self.path}.{i}")
+            if await backup.exists():
+                await backup.rename(f"{self.path}.{i + 1}")
+        await AsyncPath(self.path).rename(f"{self.path}.1")
+
+    async def _run(self):
+        file = await self._open()
+        try:
+            stopping = False
+            while not stopping:
+                batch = [await self.queue.get()]
+                while len(batch) < self.batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                if batch[-1] is None:
+                    stopping = True
+                    batch.pop()
+                if not batch:
+                    continue
+                data = "".join(batch)
+                size = len(data.encode())
+                if self.size and self.size + size > self.max_bytes:
+                    await file.close()
+                    await self._rotate()
+                    file = await self._open()
+                await file.write(data)
+                await file.flush()
+                self.size += size
+        finally:
+            await file.close()
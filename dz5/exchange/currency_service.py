@@ -1,19 +1,81 @@
-from datetime import datetime, timedelta
+import asyncio
+from datetime import date as date_type, datetime, timedelta
+from .analytics import DATE_FORMAT, RateSeriesStore
 from .api_client import PrivatBankAPIClient
 from .data_formatter import format_currency_data
+from .exceptions import APIClientError
+
+MAX_CONCURRENT_REQUESTS = 10
+MAX_RANGE_DAYS = 366
 
 class CurrencyService:
-    def __init__(self, currencies=None):
-        self.client = PrivatBankAPIClient()
+    def __init__(self, currencies=None, max_concurrent=MAX_CONCURRENT_REQUESTS, client=None, store=None):
+        # A shared client is owned (and closed) by the caller; otherwise the service owns its own
+        self.owns_client = client is None
+        self.client = client or PrivatBankAPIClient()
         self.currencies = currencies or ["USD", "EUR"]
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.store = store if store is not None else RateSeriesStore()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.owns_client:
+            await self.client.close()
+
+    async def fetch_day(self, formatted_date: str):
+        async with self.semaphore:
+            data = await self.client.fetch_rates_for_date(formatted_date)
+        return format_currency_data(data, formatted_date, self.currencies)
 
     async def get_exchange_rates(self, days: int):
+        """Fetch all days concurrently; a failed day is reported as {date: {"error": ...}}."""
         today = datetime.now()
+        dates = [(today - timedelta(days=i)).strftime("%d.%m.%Y") for i in range(days)]
+        responses = await asyncio.gather(*(self.fetch_day(date) for date in dates), return_exceptions=True)
         results = []
-        for i in range(days):
-            date = today - timedelta(days=i)
-            formatted_date = date.strftime("%d.%m.%Y")
-            data = await self.client.fetch_rates_for_date(formatted_date)
-            filtered = format_currency_data(data, formatted_date, self.currencies)
-            results.append(filtered)
+        for date, response in zip(dates, responses):
+            if isinstance(response, APIClientError):
+                results.append({date: {"error": str(response)}})
+            elif isinstance(response, BaseException):
+                raise response
+            else:
+                results.append(response)
         return results
+
+    async def load_day(self, day: date_type):
+        async with self.semaphore:
+            data = await self.client.fetch_rates_for_date(day.strftime(DATE_FORMAT))
+        self.store.add(day, data)
+
+    async def get_rate_series(self, start: date_type, end: date_type):
+        """Min/max/avg and day-over-day changes for self.currencies over [start, end].
+
+        Days missing from the store are fetched concurrently; days that fail
+        are listed under "errors" and left out of the statistics.
+        """
+        if end < start:
+            start, end = end, start
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            raise ValueError(f"Діапазон не може перевищувати {MAX_RANGE_DAYS} днів.")
+        missing = [
+            start + timedelta(days=i) for i in range((end - start).days + 1)
+            if start + timedelta(days=i) not in self.store
+        ]
+        responses = await asyncio.gather(*(self.load_day(day) for day in missing), return_exceptions=True)
+        errors = {}
+        for day, response in zip(missing, responses):
+            if isinstance(response, APIClientError):
+                errors[day.strftime(DATE_FORMAT)] = str(response)
+            elif isinstance(response, BaseException):
+                raise response
+        return {
+            "from": start.strftime(DATE_FORMAT),
+            "to": end.strftime(DATE_FORMAT),
+            "currencies": self.store.query(start, end, self.currencies),
+            "errors": errors,
+        }
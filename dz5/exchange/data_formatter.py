@@ -1,10 +1,11 @@
-def format_currency_data(data: dict, date: str, currencies: list) -> dict:
-    result = {}
+def format_currency_data(data: dict, date: str, currencies) -> dict:
+    wanted = set(currencies)
+    rates = {}
     for entry in data.get("exchangeRate", []):
-        if entry.get("currency") in currencies:
-            result.setdefault(date, {})
-            result[date][entry["currency"]] = {
+        currency = entry.get("currency")
+        if currency in wanted:
+            rates[currency] = {
                 "sale": entry.get("saleRate", entry.get("saleRateNB")),
                 "purchase": entry.get("purchaseRate", entry.get("purchaseRateNB")),
             }
-    return result
+    return {date: rates} if rates else {}
@@ -1,3 +1,13 @@
 class APIClientError(Exception):
     """Кастомна помилка для API-клієнта."""
     pass
+
+
+class TransientAPIError(APIClientError):
+    """Тимчасова помилка (мережа, таймаут, 429/5xx), запит можна повторити."""
+    pass
+
+
+class CircuitOpenError(APIClientError):
+    """Запит не виконано: API тимчасово вимкнено запобіжником."""
+    pass
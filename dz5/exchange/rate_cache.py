@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rates_cache.sqlite3")
+TODAY_TTL = 300
+
+CacheEntry = namedtuple("CacheEntry", "data fresh")
+
+
+class RateCache:
+    """SQLite cache of PrivatBank responses keyed by date.
+
+    Rates for a day never change once the day is over, so a response fetched
+    after that day's local midnight is kept for good. Anything fetched
+    earlier (today's rates, or a past day cached while it was still today)
+    and empty responses expire after today_ttl seconds. The default file
+    lives next to this module, so dz5/main.py and chat_server.py share it.
+    """
+
+    def __init__(self, path=CACHE_FILE, today_ttl=TODAY_TTL):
+        self.path = path
+        self.today_ttl = today_ttl
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stale": 0}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rates (date TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def is_final(date: str, data, fetched_at: float) -> bool:
+        day_end = datetime.strptime(date, "%d.%m.%Y") + timedelta(days=1)
+        return fetched_at >= day_end.timestamp() and bool(data.get("exchangeRate"))
+
+    def _get(self, date):
+        with self.lock:
+            return self.conn.execute("SELECT payload, fetched_at FROM rates WHERE date = ?", (date,)).fetchone()
+
+    def _set(self, date, payload):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rates (date, payload, fetched_at) VALUES (?, ?, ?)",
+                (date, payload, time.time()),
+            )
+            self.conn.commit()
+
+    async def get(self, date: str, allow_stale=False):
+        entry = await self.lookup(date)
+        served = entry is not None and (entry.fresh or allow_stale)
+        self.count(entry, served)
+        return entry.data if served else None
+
+    async def lookup(self, date: str):
+        """The CacheEntry for date, or None; unlike get() it leaves stats to the caller (see count())."""
+        row = await asyncio.to_thread(self._get, date)
+        if row is None:
+            return None
+        payload, fetched_at = row
+        data = json.loads(payload)
+        fresh = self.is_final(date, data, fetched_at) or time.time() - fetched_at <= self.today_ttl
+        return CacheEntry(data, fresh)
+
+    def count(self, entry, served):
+        """Record one lookup() in stats: a hit, a stale entry served anyway, or a miss."""
+        if entry is None:
+            self.stats["misses"] += 1
+        elif entry.fresh:
+            self.stats["hits"] += 1
+        elif served:
+            self.stats["stale"] += 1
+        else:
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+
+    async def set(self, date: str, data: dict):
+        await asyncio.to_thread(self._set, date, json.dumps(data, ensure_ascii=False))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,88 @@
+import asyncio
+import random
+import sys
+import zlib
+from aiohttp import web
+
+CURRENCIES = {"USD": 41.0, "EUR": 45.0, "PLN": 10.5, "GBP": 52.0, "CHF": 46.5, "CZK": 1.8}
+
+
+def make_rates(date: str) -> dict:
+    """Deterministic PrivatBank-shaped payload: the same date always returns the same rates."""
+    shift = (zlib.crc32(date.encode()) % 100) / 100
+    return {
+        "date": date,
+        "bank": "PB",
+        "baseCurrency": 980,
+        "baseCurrencyLit": "UAH",
+        "exchangeRate": [
+            {
+                "baseCurrency": "UAH",
+                "currency": currency,
+                "saleRateNB": round(rate + shift, 4),
+                "purchaseRateNB": round(rate + shift, 4),
+                "saleRate": round(rate + shift + 0.3, 4),
+                "purchaseRate": round(rate + shift - 0.3, 4),
+            }
+            for currency, rate in CURRENCIES.items()
+        ],
+    }
+
+
+class StubPrivatBankServer:
+    """Local fake of the PrivatBank exchange_rates endpoint for tests and benchmarks."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0, fail_status=503, seed=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.fail_next = 0  # the next N requests fail with fail_status
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/p24api/exchange_rates?json&date={{date}}"
+
+    async def handle(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_next > 0 or self.random.random() < self.fail_rate:
+            self.fail_next = max(self.fail_next - 1, 0)
+            return web.json_response({"error": "stub failure"}, status=self.fail_status)
+        return web.json_response(make_rates(request.query.get("date", "")))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/p24api/exchange_rates", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+async def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    async with StubPrivatBankServer(port=port) as server:
+        print(f"Stub PrivatBank API: {server.base_url}")
+        await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
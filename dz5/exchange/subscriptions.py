@@ -0,0 +1,81 @@
+import asyncio
+import json
+from datetime import datetime
+from .data_formatter import format_currency_data
+from .exceptions import APIClientError
+
+POLL_INTERVAL = 60
+
+
+class RateSubscriptions:
+    """Live rate updates pushed to subscribed websockets.
+
+    While anyone is subscribed, one task polls today's rates every interval
+    seconds, so N subscribers cost one upstream request per poll. Only
+    currencies whose rates changed are pushed, and each subscriber gets
+    just the currencies it asked for.
+    """
+
+    def __init__(self, client, broadcaster, interval=POLL_INTERVAL):
+        self.client = client
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.subscribers = {}
+        self.latest = {}
+        self.date = None
+        self.polls = 0
+        self.errors = 0
+        self.task = None
+
+    def subscribe(self, websocket, currencies):
+        self.subscribers[websocket] = set(currencies)
+        snapshot = {currency: self.latest[currency] for currency in currencies if currency in self.latest}
+        if snapshot:
+            self.broadcaster.deliver(websocket, encode_update(self.date, snapshot))
+        if self.task is None:
+            self.task = asyncio.create_task(self._poll_loop())
+
+    def unsubscribe(self, websocket):
+        if self.subscribers.pop(websocket, None) is None or self.subscribers:
+            return
+        self.task.cancel()
+        self.task = None
+        self.latest = {}
+
+    async def poll(self):
+        date = datetime.now().strftime("%d.%m.%Y")
+        data = await self.client.fetch_rates_for_date(date, use_cache=False)
+        # Keep every currency, so a new subscriber gets a snapshot right away
+        all_currencies = {entry.get("currency") for entry in data.get("exchangeRate", [])}
+        rates = format_currency_data(data, date, all_currencies).get(date, {})
+        changed = {currency: rate for currency, rate in rates.items() if self.latest.get(currency) != rate}
+        self.polls += 1
+        self.latest.update(rates)
+        self.date = date
+        if not changed:
+            return
+        # Subscribers with the same set of changed currencies share one encoded message
+        encoded = {}
+        for websocket, currencies in list(self.subscribers.items()):
+            diff = sorted(currencies & changed.keys())
+            if not diff:
+                continue
+            key = tuple(diff)
+            if key not in encoded:
+                encoded[key] = encode_update(date, {currency: changed[currency] for currency in diff})
+            self.broadcaster.deliver(websocket, encoded[key])
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll()
+            except APIClientError:
+                self.errors += 1
+            await asyncio.sleep(self.interval)
+
+
+def encode_update(date, rates):
+    lines = [f"Оновлення курсів ({date}):"]
+    for currency, data in rates.items():
+        lines.append(f"  {currency}: Купівля: {data['purchase']}, Продаж: {data['sale']}")
+    return json.dumps({"message": "\n".join(lines), "rates": rates})
@@ -0,0 +1,212 @@
+"""Load generator for the dz5 chat server.
+
+Run from the repository root: python -m dz5.load_test --clients 2000 --duration 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import websockets
+
+from dz5.exchange import chat_server
+from dz5.exchange.api_client import PrivatBankAPIClient
+from dz5.exchange.command_log import CommandLogWriter
+from dz5.exchange.resilience import RateLimiter
+from dz5.exchange.stub_server import make_rates
+
+
+class StubAPIClient(PrivatBankAPIClient):
+    """PrivatBankAPIClient whose upstream request is replaced by a canned payload after `latency` seconds."""
+
+    def __init__(self, latency=0.05):
+        super().__init__(rate_limiter=RateLimiter(rate=1e9, burst=1e9))
+        self.latency = latency
+
+    async def request_rates(self, date: str):
+        await asyncio.sleep(self.latency)
+        return make_rates(date)
+
+
+def run_server(host, port, latency, log_path):
+    chat_server.command_log = CommandLogWriter(path=log_path)
+    asyncio.run(chat_server.main(host, port, api_client=StubAPIClient(latency)))
+
+
+def rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+class LoadClient:
+    def __init__(self, client_id, websocket, stats):
+        self.id = client_id
+        self.websocket = websocket
+        self.stats = stats
+        self.pending_exchange = None
+        self.seq = itertools.count()
+
+    async def reader(self):
+        try:
+            async for raw in self.websocket:
+                self.stats["received"] += 1
+                data = json.loads(raw)
+                text = data.get("message") or ""
+                if f"lt:{self.id}:" in text:
+                    sent_at = float(text.rsplit(":", 1)[1])
+                    self.stats["chat_latency"].append(time.perf_counter() - sent_at)
+                elif ("error" in data or text.startswith("Дата")) and self.pending_exchange is not None:
+                    self.pending_exchange.set_result(True)
+        finally:
+            # Evicted or disconnected: don't leave an exchange waiting for its timeout
+            if self.pending_exchange is not None and not self.pending_exchange.done():
+                self.pending_exchange.set_result(False)
+
+    async def run(self, deadline, rate, exchange_ratio, rng):
+        reader = asyncio.create_task(self.reader())
+        try:
+            while True:
+                pause = rng.expovariate(rate)
+                if time.perf_counter() + pause >= deadline:
+                    break
+                await asyncio.sleep(pause)
+                start = time.perf_counter()
+                if rng.random() < exchange_ratio:
+                    self.pending_exchange = asyncio.get_running_loop().create_future()
+                    await self.websocket.send(json.dumps({"command": f"exchange {rng.randint(1, 10)} USD EUR"}))
+                    try:
+                        answered = await asyncio.wait_for(self.pending_exchange, 30)
+                    except asyncio.TimeoutError:
+                        self.stats["timeouts"] += 1
+                        answered = None
+                    self.pending_exchange = None
+                    if answered is False:
+                        raise websockets.ConnectionClosedError(None, None)
+                    if answered:
+                        self.stats["exchange_latency"].append(time.perf_counter() - start)
+                else:
+                    await self.websocket.send(json.dumps({"message": f"lt:{self.id}:{next(self.seq)}:{start}"}))
+                self.stats["sent"] += 1
+        except websockets.ConnectionClosed:
+            self.stats["closed"] += 1
+        finally:
+            reader.cancel()
+
+
+async def connect_all(url, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def connect():
+        nonlocal failures
+        async with semaphore:
+            try:
+                return await websockets.connect(url, open_timeout=30, max_queue=None)
+            except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake):
+                failures += 1
+                return None
+
+    sockets = await asyncio.gather(*(connect() for _ in range(count)))
+    return [ws for ws in sockets if ws is not None], failures
+
+
+async def wait_for_server(url, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            async with websockets.connect(url):
+                return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_load(args, server_pid):
+    url = f"ws://{args.host}:{args.port}"
+    await wait_for_server(url)
+    rss_before = rss_bytes(server_pid)
+    sockets, failures = await connect_all(url, args.clients, args.connect_concurrency)
+    await asyncio.sleep(0.5)
+    rss_after = rss_bytes(server_pid)
+
+    stats = {"sent": 0, "received": 0, "timeouts": 0, "closed": 0, "exchange_latency": [], "chat_latency": []}
+    rng = random.Random(args.seed)
+    clients = [LoadClient(i, ws, stats) for i, ws in enumerate(sockets)]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        client.run(deadline, args.rate, args.exchange_ratio, random.Random(rng.random())) for client in clients
+    ))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+    memory = None
+    if rss_before is not None and rss_after is not None and sockets:
+        memory = round((rss_after - rss_before) / len(sockets) / 1024, 1)
+    return {
+        "clients": len(sockets),
+        "connect_failures": failures,
+        "duration_s": round(elapsed, 2),
+        "requests_sent": stats["sent"],
+        "messages_received": stats["received"],
+        "throughput_rps": round(stats["sent"] / elapsed, 1),
+        "timeouts": stats["timeouts"],
+        "closed_by_server": stats["closed"],
+        "exchange": {"count": len(stats["exchange_latency"]), **percentiles(stats["exchange_latency"])},
+        "chat": {"count": len(stats["chat_latency"]), **percentiles(stats["chat_latency"])},
+        "memory_per_connection_kb": memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Websocket load generator for the dz5 chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of traffic after all clients connect")
+    parser.add_argument("--rate", type=float, default=0.2, help="requests per second per client")
+    parser.add_argument("--exchange-ratio", type=float, default=0.8, help="share of exchange commands vs chat")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="stubbed PrivatBank latency, s")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    log_path = os.path.join(tempfile.mkdtemp(), "exchange_commands.log")
+    server = multiprocessing.Process(
+        target=run_server, args=(args.host, args.port, args.upstream_latency, log_path), daemon=True
+    )
+    server.start()
+    try:
+        report = asyncio.run(run_load(args, server.pid))
+    finally:
+        server.terminate()
+        server.join()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,36 @@
 import asyncio
+import json
 import sys
+from datetime import datetime
+from exchange.api_client import PrivatBankAPIClient
 from exchange.currency_service import CurrencyService
+from exchange.rate_cache import RateCache
+
+async def range_main(args):
+    try:
+        if len(args) < 2:
+            raise ValueError("Потрібно вказати початкову та кінцеву дати.")
+        start, end = (datetime.strptime(arg, "%d.%m.%Y").date() for arg in args[:2])
+        currencies = args[2:] or ["USD", "EUR"]
+    except ValueError as e:
+        print("Використання: python main.py range <дд.мм.рррр> <дд.мм.рррр> [валюта1] [валюта2] ...")
+        print(f"Помилка: {e}")
+        return
+
+    with RateCache() as cache:
+        async with PrivatBankAPIClient(cache=cache) as client:
+            service = CurrencyService(currencies=currencies, client=client)
+            try:
+                result = await service.get_rate_series(start, end)
+            except ValueError as e:
+                print(f"Помилка: {e}")
+                return
+    print(json.dumps(result, ensure_ascii=False, indent=2))
 
 async def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "range":
+        await range_main(sys.argv[2:])
+        return
     try:
         if len(sys.argv) < 2:
             raise ValueError("Потрібно вказати кількість днів.")
@@ -18,8 +46,10 @@ async def main():
         print(f"Помилка: {e}")
         return
 
-    service = CurrencyService(currencies=currencies)
-    result = await service.get_exchange_rates(days)
+    with RateCache() as cache:
+        async with PrivatBankAPIClient(cache=cache) as client:
+            service = CurrencyService(currencies=currencies, client=client)
+            result = await service.get_exchange_rates(days)
     print(result)
 
 if __name__ == "__main__":
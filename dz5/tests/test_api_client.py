@@ -0,0 +1,213 @@
+# tests/test_api_client.py
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+
+from exchange.api_client import PrivatBankAPIClient
+from exchange.exceptions import CircuitOpenError, TransientAPIError
+from exchange.rate_cache import RateCache
+from exchange.resilience import CircuitBreaker, RateLimiter, RetryPolicy
+from exchange.stub_server import StubPrivatBankServer, make_rates
+
+DATE = "01.12.2024"
+
+
+class StubServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Starts a StubPrivatBankServer on a free port for every test."""
+
+    async def asyncSetUp(self):
+        self.server = await StubPrivatBankServer().start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def make_client(self, retries=0, failure_threshold=5, reset_timeout=30.0, cache=None):
+        client = PrivatBankAPIClient(
+            base_url=self.server.base_url,
+            cache=cache,
+            retry=RetryPolicy(retries=retries, base_delay=0),
+            breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout),
+            rate_limiter=RateLimiter(rate=1000, burst=1000),
+        )
+        self.addAsyncCleanup(client.close)
+        return client
+
+
+class TestRetries(StubServerTestCase):
+    async def test_retries_stop_after_retries_plus_one_attempts(self):
+        """A permanently failing upstream is tried exactly retries + 1 times."""
+        self.server.fail_rate = 1.0
+        client = self.make_client(retries=2)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date(DATE)
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_transient_failures_are_retried_until_success(self):
+        """Two failures followed by a success return the data after three requests."""
+        self.server.fail_next = 2
+        client = self.make_client(retries=3)
+        data = await client.fetch_rates_for_date(DATE)
+        self.assertEqual(data, make_rates(DATE))
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_client_errors_are_not_retried(self):
+        """A 4xx other than 429 is final."""
+        self.server.fail_rate = 1.0
+        self.server.fail_status = 404
+        client = self.make_client(retries=3)
+        with self.assertRaises(Exception) as raised:
+            await client.fetch_rates_for_date(DATE)
+        self.assertNotIsInstance(raised.exception, TransientAPIError)
+        self.assertEqual(self.server.requests, 1)
+
+
+class TestCircuitBreaker(StubServerTestCase):
+    async def test_opens_after_threshold(self):
+        """After failure_threshold failed fetches the breaker refuses without calling upstream."""
+        self.server.fail_rate = 1.0
+        client = self.make_client(failure_threshold=3)
+        for day in range(1, 4):
+            with self.assertRaises(TransientAPIError):
+                await client.fetch_rates_for_date(f"0{day}.12.2024")
+        self.assertEqual(client.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            await client.fetch_rates_for_date("04.12.2024")
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_half_open_lets_a_single_trial_through(self):
+        """After reset_timeout only one of several concurrent calls reaches upstream; its success closes the circuit."""
+        self.server.fail_rate = 1.0
+        client = self.make_client(failure_threshold=1, reset_timeout=0.1)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date("01.12.2024")
+        self.assertEqual(client.breaker.state, "open")
+
+        await asyncio.sleep(0.15)
+        self.assertEqual(client.breaker.state, "half-open")
+        self.server.fail_rate = 0.0
+        self.server.latency = 0.05
+        results = await asyncio.gather(
+            *(client.fetch_rates_for_date(f"0{day}.12.2024") for day in range(2, 6)),
+            return_exceptions=True,
+        )
+        succeeded = [result for result in results if isinstance(result, dict)]
+        refused = [result for result in results if isinstance(result, CircuitOpenError)]
+        self.assertEqual(len(succeeded), 1)
+        self.assertEqual(len(refused), 3)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(client.breaker.state, "closed")
+
+    async def test_failed_trial_reopens(self):
+        """A failing half-open trial opens the circuit again."""
+        self.server.fail_rate = 1.0
+        client = self.make_client(failure_threshold=1, reset_timeout=0.1)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date("01.12.2024")
+        await asyncio.sleep(0.15)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date("02.12.2024")
+        self.assertEqual(client.breaker.state, "open")
+        self.assertEqual(self.server.requests, 2)
+
+    async def test_client_errors_do_not_open(self):
+        """A 404 means upstream is up: it neither opens the circuit nor fails a half-open trial."""
+        self.server.fail_rate = 1.0
+        self.server.fail_status = 404
+        client = self.make_client(failure_threshold=2, reset_timeout=0.1)
+        for day in range(1, 4):
+            with self.assertRaises(Exception) as raised:
+                await client.fetch_rates_for_date(f"0{day}.12.2024")
+            self.assertNotIsInstance(raised.exception, CircuitOpenError)
+        self.assertEqual(client.breaker.state, "closed")
+
+        self.server.fail_status = 503
+        for day in range(4, 6):
+            with self.assertRaises(TransientAPIError):
+                await client.fetch_rates_for_date(f"0{day}.12.2024")
+        self.assertEqual(client.breaker.state, "open")
+        await asyncio.sleep(0.15)
+        self.server.fail_status = 404
+        with self.assertRaises(Exception):
+            await client.fetch_rates_for_date("06.12.2024")
+        self.assertEqual(client.breaker.state, "closed")
+
+
+class TestStaleServing(StubServerTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        directory = tempfile.mkdtemp()
+        # today_ttl=0: today's entries are stale as soon as they are written
+        self.cache = RateCache(path=os.path.join(directory, "rates.sqlite3"), today_ttl=0)
+        self.addCleanup(self.cache.close)
+        self.today = date.today().strftime("%d.%m.%Y")
+
+    async def test_stale_entry_served_while_breaker_is_open(self):
+        """With the circuit open, an expired cache entry is returned instead of an error."""
+        stale = {"date": self.today, "exchangeRate": [], "note": "cached"}
+        await self.cache.set(self.today, stale)
+        time.sleep(0.01)
+        self.server.fail_rate = 1.0
+        client = self.make_client(failure_threshold=1, cache=self.cache)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date("01.12.2024")
+        self.assertEqual(client.breaker.state, "open")
+
+        data = await client.fetch_rates_for_date(self.today)
+        self.assertEqual(data, stale)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.cache.stats["stale"], 1)
+        # the stale read is counted once, not also as a miss; the miss is 01.12.2024's
+        self.assertEqual(self.cache.stats["misses"], 1)
+
+    async def test_open_breaker_without_cache_entry_raises(self):
+        self.server.fail_rate = 1.0
+        client = self.make_client(failure_threshold=1, cache=self.cache)
+        with self.assertRaises(TransientAPIError):
+            await client.fetch_rates_for_date("01.12.2024")
+        with self.assertRaises(CircuitOpenError):
+            await client.fetch_rates_for_date(self.today)
+
+
+class TestSingleFlight(StubServerTestCase):
+    async def test_concurrent_calls_share_one_request(self):
+        """N concurrent fetches for one date produce a single upstream request."""
+        self.server.latency = 0.1
+        client = self.make_client()
+        results = await asyncio.gather(*(client.fetch_rates_for_date(DATE) for _ in range(20)))
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(client.coalesced, 19)
+        self.assertTrue(all(result == make_rates(DATE) for result in results))
+
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self):
+        self.server.latency = 0.1
+        client = self.make_client()
+        first = asyncio.create_task(client.fetch_rates_for_date(DATE))
+        second = asyncio.create_task(client.fetch_rates_for_date(DATE))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        self.assertEqual(await second, make_rates(DATE))
+        self.assertEqual(self.server.requests, 1)
+
+    async def test_later_call_starts_a_new_fetch(self):
+        """The in-flight entry is dropped once the fetch completes."""
+        client = self.make_client()
+        await client.fetch_rates_for_date(DATE)
+        await client.fetch_rates_for_date(DATE)
+        self.assertEqual(self.server.requests, 2)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_limits_requests_after_burst(self):
+        limiter = RateLimiter(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(7):
+            await limiter.acquire()
+        # 2 from the burst, the other 5 at 50/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+if __name__ == '__main__':
+    unittest.main()
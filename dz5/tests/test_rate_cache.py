@@ -0,0 +1,43 @@
+# tests/test_rate_cache.py
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta
+
+from exchange.rate_cache import RateCache
+from exchange.stub_server import make_rates
+
+
+class TestRateCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        # today_ttl=0: only entries that are final count as fresh
+        self.cache = RateCache(path=os.path.join(directory, "rates.sqlite3"), today_ttl=0)
+        self.addCleanup(self.cache.close)
+        yesterday = date.today() - timedelta(days=1)
+        self.yesterday = yesterday.strftime("%d.%m.%Y")
+        self.yesterday_noon = datetime.combine(yesterday, time(12)).timestamp()
+        self.midnight = datetime.combine(date.today(), time()).timestamp()
+
+    def store(self, day, data, fetched_at):
+        self.cache.conn.execute("INSERT OR REPLACE INTO rates (date, payload, fetched_at) VALUES (?, ?, ?)",
+                                (day, json.dumps(data), fetched_at))
+
+    async def test_day_fetched_after_it_ended_is_kept(self):
+        self.store(self.yesterday, make_rates(self.yesterday), self.midnight)
+        self.assertEqual(await self.cache.get(self.yesterday), make_rates(self.yesterday))
+
+    async def test_day_fetched_before_it_ended_expires(self):
+        """An entry cached while its date was still today keeps the TTL after midnight."""
+        self.store(self.yesterday, make_rates(self.yesterday), self.yesterday_noon)
+        self.assertIsNone(await self.cache.get(self.yesterday))
+        self.assertEqual(self.cache.stats["expired"], 1)
+
+    async def test_empty_response_is_not_kept(self):
+        self.store(self.yesterday, {"date": self.yesterday, "exchangeRate": []}, self.midnight)
+        self.assertIsNone(await self.cache.get(self.yesterday))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import argparse
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from main2 import DB_FILE, QueryRunner
+
+REPEAT = 5
+WRITE_SAMPLE = 10000
+
+# Running sums/counts of grades, maintained by triggers on grades. Group and
+# teacher averages are joined from these through students.group_id and
+# subjects.teacher_id, so moving a student or subject never leaves them stale.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS student_grade_stats (
+    student_id INTEGER PRIMARY KEY,
+    grade_sum INTEGER NOT NULL,
+    grade_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS subject_grade_stats (
+    subject_id INTEGER PRIMARY KEY,
+    grade_sum INTEGER NOT NULL,
+    grade_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS student_subject_stats (
+    subject_id INTEGER NOT NULL,
+    student_id INTEGER NOT NULL,
+    grade_sum INTEGER NOT NULL,
+    grade_count INTEGER NOT NULL,
+    PRIMARY KEY (subject_id, student_id)
+) WITHOUT ROWID;
+'''
+
+STATS_TABLES = {
+    "student_grade_stats": ("student_id",),
+    "subject_grade_stats": ("subject_id",),
+    "student_subject_stats": ("subject_id", "student_id"),
+}
+
+
+def _add(table, keys, row):
+    columns = ', '.join(keys)
+    values = ', '.join(f'{row}.{key}' for key in keys)
+    return (f'INSERT INTO {table} ({columns}, grade_sum, grade_count) VALUES ({values}, {row}.grade, 1) '
+            f'ON CONFLICT ({columns}) DO UPDATE SET grade_sum = grade_sum + excluded.grade_sum, '
+            f'grade_count = grade_count + 1;')
+
+
+def _remove(table, keys, row):
+    where = ' AND '.join(f'{key} = {row}.{key}' for key in keys)
+    return f'UPDATE {table} SET grade_sum = grade_sum - {row}.grade, grade_count = grade_count - 1 WHERE {where};'
+
+
+def _trigger_sql():
+    add_new = '\n    '.join(_add(table, keys, 'new') for table, keys in STATS_TABLES.items())
+    remove_old = '\n    '.join(_remove(table, keys, 'old') for table, keys in STATS_TABLES.items())
+    # NULL grades are ignored, like AVG() does
+    return f'''
+CREATE TRIGGER IF NOT EXISTS grades_stats_insert AFTER INSERT ON grades
+WHEN new.grade IS NOT NULL BEGIN
+    {add_new}
+END;
+
+CREATE TRIGGER IF NOT EXISTS grades_stats_delete AFTER DELETE ON grades
+WHEN old.grade IS NOT NULL BEGIN
+    {remove_old}
+END;
+
+CREATE TRIGGER IF NOT EXISTS grades_stats_update_old AFTER UPDATE OF student_id, subject_id, grade ON grades
+WHEN old.grade IS NOT NULL BEGIN
+    {remove_old}
+END;
+
+CREATE TRIGGER IF NOT EXISTS grades_stats_update_new AFTER UPDATE OF student_id, subject_id, grade ON grades
+WHEN new.grade IS NOT NULL BEGIN
+    {add_new}
+END;
+'''
+
+
+TRIGGERS = ('grades_stats_insert', 'grades_stats_delete', 'grades_stats_update_old', 'grades_stats_update_new')
+
+# Drop-in replacements for the query_N.sql files that average over grades;
+# same parameters, same columns.
+AGGREGATE_QUERIES = {
+    1: """
+SELECT s.student_name, ROUND(CAST(a.grade_sum AS REAL) / a.grade_count, 2) as avg_grade
+FROM students s
+JOIN student_grade_stats a ON s.student_id = a.student_id
+WHERE a.grade_count > 0
+ORDER BY avg_grade DESC
+LIMIT 5;
+""",
+    3: """
+SELECT gr.group_name, ROUND(CAST(SUM(a.grade_sum) AS REAL) / SUM(a.grade_count), 2) as avg_grade
+FROM groups gr
+JOIN students s ON gr.group_id = s.group_id
+JOIN student_subject_stats a ON s.student_id = a.student_id
+WHERE a.subject_id = :subject_id AND a.grade_count > 0
+GROUP BY gr.group_id, gr.group_name;
+""",
+    4: """
+SELECT ROUND(CAST(SUM(grade_sum) AS REAL) / SUM(grade_count), 2) as avg_grade
+FROM subject_grade_stats;
+""",
+    8: """
+SELECT ROUND(CAST(SUM(a.grade_sum) AS REAL) / SUM(a.grade_count), 2) as avg_grade
+FROM subject_grade_stats a
+JOIN subjects sub ON a.subject_id = sub.subject_id
+WHERE sub.teacher_id = :teacher_id;
+""",
+    11: """
+SELECT ROUND(CAST(SUM(a.grade_sum) AS REAL) / SUM(a.grade_count), 2) as avg_grade
+FROM student_subject_stats a
+JOIN subjects sub ON a.subject_id = sub.subject_id
+WHERE a.student_id = :student_id AND sub.teacher_id = :teacher_id;
+""",
+}
+
+
+def rebuild(conn):
+    """Recompute every stats table from grades."""
+    with conn:
+        for table, keys in STATS_TABLES.items():
+            columns = ', '.join(keys)
+            conn.execute(f'DELETE FROM {table}')
+            conn.execute(f'INSERT INTO {table} ({columns}, grade_sum, grade_count) '
+                         f'SELECT {columns}, SUM(grade), COUNT(grade) FROM grades '
+                         f'WHERE grade IS NOT NULL GROUP BY {columns}')
+
+
+def install(conn):
+    """Create the stats tables and triggers, then fill the tables from grades."""
+    conn.executescript(SCHEMA + _trigger_sql())
+    rebuild(conn)
+
+
+def installed(conn):
+    placeholders = ', '.join('?' * len(TRIGGERS))
+    return conn.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                        TRIGGERS).fetchone()[0] > 0
+
+
+def drop_triggers(conn):
+    with conn:
+        for name in TRIGGERS:
+            conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+@contextmanager
+def bulk_load(conn):
+    """Suspend the triggers around a bulk rewrite of grades.
+
+    Per-row triggers would fire for every deleted and inserted grade (and
+    disable SQLite's DELETE truncate optimisation); instead the stats are
+    rebuilt once afterwards. Does nothing if the aggregates aren't installed.
+    """
+    if not installed(conn):
+        yield
+        return
+    drop_triggers(conn)
+    try:
+        yield
+    finally:
+        install(conn)
+
+
+def uninstall(conn):
+    drop_triggers(conn)
+    with conn:
+        for table in STATS_TABLES:
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def time_writes(conn, count=WRITE_SAMPLE, seed=0):
+    """Seconds to insert count grades in one transaction; rolled back afterwards."""
+    rng = random.Random(seed)
+    students = conn.execute('SELECT MAX(student_id) FROM students').fetchone()[0] or 1
+    subjects = conn.execute('SELECT MAX(subject_id) FROM subjects').fetchone()[0] or 1
+    rows = [(rng.randint(1, students), rng.randint(1, subjects), rng.randint(60, 100), '2024-01-01')
+            for _ in range(count)]
+    start = time.perf_counter()
+    conn.executemany('INSERT INTO grades (student_id, subject_id, grade, date_received) VALUES (?, ?, ?, ?)', rows)
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed
+
+
+def benchmark(db_file, queries_dir='.', repeat=REPEAT):
+    conn = sqlite3.connect(db_file)
+    try:
+        uninstall(conn)
+        plain_writes = time_writes(conn)
+        start = time.perf_counter()
+        install(conn)
+        print(f"Built aggregates in {time.perf_counter() - start:.2f}s")
+        trigger_writes = time_writes(conn)
+    finally:
+        conn.close()
+    print(f"Inserting {WRITE_SAMPLE} grades: {plain_writes * 1000:.1f} ms without triggers, "
+          f"{trigger_writes * 1000:.1f} ms with triggers")
+
+    with QueryRunner(db_file, queries_dir) as base, \
+            QueryRunner(db_file, queries_dir, overrides=AGGREGATE_QUERIES) as fast:
+        print(f"{'query':<10}{'grades, ms':>14}{'aggregates, ms':>16}{'speedup':>10}  same result")
+        for number in AGGREGATE_QUERIES:
+            old = min(base.time(number, repeat))
+            new = min(fast.time(number, repeat))
+            same = base.run(number)[1] == fast.run(number)[1]
+            print(f"query_{number:<4}{old * 1000:>14.2f}{new * 1000:>16.3f}{old / new:>9.1f}x  {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigger-maintained grade aggregates for the dz6 queries.")
+    parser.add_argument('action', choices=('install', 'rebuild', 'uninstall', 'benchmark'))
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--queries', default='.', help="directory with query_N.sql files")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    if args.action == 'benchmark':
+        benchmark(args.db, args.queries, args.repeat)
+        return
+    conn = sqlite3.connect(args.db)
+    try:
+        {'install': install, 'rebuild': rebuild, 'uninstall': uninstall}[args.action](conn)
+    finally:
+        conn.close()
+    print(f"Aggregates: {args.action} done")
+
+
+if __name__ == '__main__':
+    main()
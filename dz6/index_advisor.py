@@ -0,0 +1,280 @@
+import argparse
+import re
+import sqlite3
+import time
+
+from main2 import DEFAULT_PARAMS, PARAM_RE, load_queries, parse_param
+
+DB_FILE = 'university.db'
+REPEAT = 3
+INDEX_PREFIX = 'advisor_'
+
+PLAN_STEP_RE = re.compile(r'(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(.*)')
+TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|GROUP|ORDER|LIMIT|INNER|LEFT|CROSS)\b)(\w+))?',
+                      re.IGNORECASE)
+COLUMN_RE = re.compile(r'(?<![\w.:])(?:(\w+)\.)?(\w+)\b(?!\s*\.)')
+SUBQUERY = '__subquery__'
+EQUALITY_RE = re.compile(rf'([\w.:]+)\s*=\s*([\w.:]+)|([\w.]+)\s+IN\s*(?:\(|{SUBQUERY})', re.IGNORECASE)
+
+
+def bind(sql, params=None):
+    values = {**DEFAULT_PARAMS, **(params or {})}
+    return {name: values[name] for name in PARAM_RE.findall(sql)}
+
+
+def query_plan(conn, sql, params=None):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', bind(sql, params))]
+
+
+def full_scans(plan):
+    # "SCAN grades" reads the whole table; "SCAN g USING COVERING INDEX ..." is fine
+    return [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+
+
+def unindexed(plan):
+    """Aliases the plan reads through the table rows rather than a covering index.
+
+    SCAN without an index, SEARCH without one, a non-covering index and an
+    automatic index SQLite builds afresh on every run all qualify; rowid and
+    primary key lookups don't.
+    """
+    aliases = []
+    for step in plan:
+        match = PLAN_STEP_RE.fullmatch(step)
+        if match is None:
+            continue
+        _, table, alias, access = match.groups()
+        if 'PRIMARY KEY' in access or ('COVERING INDEX' in access and 'AUTOMATIC' not in access):
+            continue
+        aliases.append(alias or table)
+    return aliases
+
+
+def split_scopes(sql):
+    """The SELECT itself and every parenthesised sub-SELECT, each with nested ones cut out."""
+    scopes, outer, i = [], [], 0
+    while i < len(sql):
+        match = re.match(r'\(\s*SELECT\b', sql[i:], re.IGNORECASE)
+        if match is None:
+            outer.append(sql[i])
+            i += 1
+            continue
+        depth, j = 0, i
+        while True:
+            depth += {'(': 1, ')': -1}.get(sql[j], 0)
+            j += 1
+            if depth == 0:
+                break
+        scopes += split_scopes(sql[i + 1:j - 1])
+        outer.append(SUBQUERY)
+        i = j
+    return [''.join(outer)] + scopes
+
+
+class Schema:
+    def __init__(self, conn):
+        self.columns = {}
+        self.rowid = {}
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            info = conn.execute(f'PRAGMA table_info({table})').fetchall()
+            self.columns[table] = [row[1] for row in info]
+            keys = [row for row in info if row[5]]
+            if len(keys) == 1 and keys[0][2].upper() == 'INTEGER':
+                self.rowid[table] = keys[0][1]
+
+
+def column_usage(sql, schema):
+    """{alias: (table, equality columns, join columns, other columns)} for every table sql reads.
+
+    Equality columns are compared with a parameter, literal or subquery
+    (or tested with IN), join columns with another table's column. Names
+    are resolved per SELECT scope; an unqualified name goes to the one
+    table in its scope that has such a column.
+    """
+    usage = {}
+    for scope in split_scopes(sql):
+        aliases = {}
+        for table, alias in TABLE_RE.findall(scope):
+            if table in schema.columns:
+                aliases[alias or table] = table
+                usage.setdefault(alias or table, (table, [], [], []))
+
+        def resolve(ref):
+            alias, _, column = ref.rpartition('.')
+            if alias:
+                return (alias, column) if alias in usage and column in schema.columns[usage[alias][0]] else None
+            owners = [name for name, table in aliases.items() if column in schema.columns[table]]
+            return (owners[0], column) if len(owners) == 1 else None
+
+        for left, right, listed in EQUALITY_RE.findall(scope):
+            if listed:
+                refs = [(resolve(listed), None)]
+            else:
+                refs = [(resolve(left), resolve(right)), (resolve(right), resolve(left))]
+            for ref, other in refs:
+                if ref is not None:
+                    alias, column = ref
+                    usage[alias][2 if other else 1].append(column)
+        for alias, column in COLUMN_RE.findall(scope):
+            ref = resolve(f'{alias}.{column}' if alias else column)
+            if ref is not None:
+                usage[ref[0]][3].append(ref[1])
+    return usage
+
+
+def covering_index(table, equality, join, other, schema):
+    """(table, constant columns, join columns, columns) for a covering index; no rowid.
+
+    Constant-compared columns lead, then join columns, then the rest the query reads.
+    """
+    columns = []
+    for column in [*equality, *join, *sorted(set(other), key=schema.columns[table].index)]:
+        if column not in columns and column != schema.rowid.get(table):
+            columns.append(column)
+    constant = tuple(column for column in columns if column in equality)
+    joined = tuple(column for column in columns if column in join and column not in equality)
+    return table, constant, joined, tuple(columns)
+
+
+def covers(index, candidate):
+    # index serves candidate's lookups if it leads with the same constant, then join, columns and holds all the rest
+    table, _, _, columns = index
+    other_table, constant, joined, other_columns = candidate
+    key = len(constant) + len(joined)
+    return (table == other_table and set(columns[:len(constant)]) == set(constant)
+            and set(columns[len(constant):key]) == set(joined) and set(other_columns) <= set(columns))
+
+
+def suggest_indexes(conn, queries, plans):
+    """{name: (table, columns)}: one covering index per table access the plans don't already cover.
+
+    A candidate that a wider one already covers (same leading constant and
+    join columns, superset of columns) is dropped.
+    """
+    schema = Schema(conn)
+    candidates = set()
+    for number, sql in queries.items():
+        usage = column_usage(sql, schema)
+        for alias in unindexed(plans[number]):
+            if alias in usage:
+                table, equality, join, other = usage[alias]
+                candidate = covering_index(table, equality, join, other, schema)
+                if candidate[3]:
+                    candidates.add(candidate)
+    kept = []
+    for candidate in sorted(candidates, key=lambda candidate: (-len(candidate[3]), candidate)):
+        if not any(covers(index, candidate) for index in kept):
+            kept.append(candidate)
+    return {f"{INDEX_PREFIX}{table}_{'_'.join(columns)}": (table, columns) for table, _, _, columns in sorted(kept)}
+
+
+def time_query(conn, sql, repeat=REPEAT, params=None):
+    bound = bind(sql, params)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, bound).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def drop_indexes(conn, names=None):
+    """Drop the given indexes, by default every one this tool created earlier."""
+    if names is None:
+        names = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE ?",
+                                                  (INDEX_PREFIX + '%',))]
+    for name in names:
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+    conn.commit()
+
+
+def create_indexes(conn, indexes):
+    for name, (table, columns) in indexes.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})')
+    conn.execute('ANALYZE')
+    conn.commit()
+
+
+def measure(conn, queries, repeat, params=None):
+    return {
+        number: {"plan": query_plan(conn, sql, params), "seconds": time_query(conn, sql, repeat, params)}
+        for number, sql in queries.items()
+    }
+
+
+def used_by(indexes, results):
+    """{index name: [query numbers whose plan uses it]}."""
+    return {name: [number for number, result in results.items()
+                   if any(re.search(rf'\b{name}\b', step) for step in result["plan"])]
+            for name in indexes}
+
+
+def print_plans(title, results):
+    print(f"== {title} ==")
+    for number, result in results.items():
+        marker = '  <-- full scan' if full_scans(result["plan"]) else ''
+        print(f"query_{number}:{marker}")
+        for step in result["plan"]:
+            print(f"    {step}")
+
+
+def print_indexes(indexes, usage=None):
+    for name, (table, columns) in indexes.items():
+        line = f"    {name} ON {table} ({', '.join(columns)})"
+        if usage is not None:
+            queries = ', '.join(f'query_{number}' for number in usage[name])
+            line += f"  used by {queries}" if queries else "  unused, dropped"
+        print(line)
+
+
+def print_report(before, after):
+    print(f"{'query':<10}{'before, ms':>14}{'after, ms':>14}{'speedup':>10}")
+    for number in before:
+        old, new = before[number]["seconds"], after[number]["seconds"]
+        print(f"query_{number:<4}{old * 1000:>14.2f}{new * 1000:>14.2f}{old / new:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Suggest covering indexes for the query_N.sql files from their query plans, then benchmark them.")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--queries', default='.', help="directory with query_N.sql files")
+    parser.add_argument('--param', action='append', type=parse_param, default=[], metavar='NAME=VALUE',
+                        help=f"override a query parameter (defaults: {DEFAULT_PARAMS})")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="runs per query, best one is reported")
+    parser.add_argument('--plan-only', action='store_true',
+                        help="only show query plans and suggested indexes for the current schema")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    if not queries:
+        parser.error(f"no query_N.sql files in {args.queries}")
+    params = dict(args.param)
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.plan_only:
+            plans = {number: query_plan(conn, sql, params) for number, sql in queries.items()}
+            print_plans("current schema", {number: {"plan": plan} for number, plan in plans.items()})
+            print("suggested indexes:")
+            print_indexes(suggest_indexes(conn, queries, plans))
+            return
+        drop_indexes(conn)
+        before = measure(conn, queries, args.repeat, params)
+        print_plans("without indexes", before)
+        indexes = suggest_indexes(conn, queries, {number: result["plan"] for number, result in before.items()})
+        create_indexes(conn, indexes)
+        after = measure(conn, queries, args.repeat, params)
+        print_plans("with suggested indexes", after)
+        usage = used_by(indexes, after)
+        drop_indexes(conn, [name for name, numbers in usage.items() if not numbers])
+        print()
+        print("suggested indexes:")
+        print_indexes(indexes, usage)
+        print()
+        print_report(before, after)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
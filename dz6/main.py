@@ -1,17 +1,25 @@
+import argparse
+import itertools
+import random
 import sqlite3
+import time
+from datetime import date, timedelta
+
 from faker import Faker
-import random
-from datetime import datetime, timedelta
 
-# Initialize Faker
-fake = Faker()
+import aggregates
 
-# Connect to SQLite database
-conn = sqlite3.connect('university.db')
-cursor = conn.cursor()
+DB_FILE = 'university.db'
+GROUPS = 3
+TEACHERS = 5
+SUBJECTS = 6
+STUDENTS = 50
+GRADES_PER_STUDENT = (15, 20)
+GRADE_RANGE = (60, 100)
+NAME_POOL_SIZE = 5000
+CHUNK_SIZE = 50000
 
-# Create tables
-cursor.executescript('''
+SCHEMA = '''
 CREATE TABLE IF NOT EXISTS groups (
     group_id INTEGER PRIMARY KEY,
     group_name TEXT NOT NULL
@@ -45,50 +53,13 @@ CREATE TABLE IF NOT EXISTS grades (
     FOREIGN KEY (student_id) REFERENCES students(student_id),
     FOREIGN KEY (subject_id) REFERENCES subjects(subject_id)
 );
-''')
-
-# Generate data
-# Groups
-groups = [(i, f'Group-{chr(65+i)}') for i in range(3)]
-cursor.executemany('INSERT INTO groups (group_id, group_name) VALUES (?, ?)', groups)
-
-# Teachers
-teachers = [(i, fake.name()) for i in range(1, 6)]
-cursor.executemany('INSERT INTO teachers (teacher_id, teacher_name) VALUES (?, ?)', teachers)
-
-# Subjects
-subjects = [(i, fake.word().capitalize() + " Studies", random.randint(1, 5)) for i in range(1, 7)]
-cursor.executemany('INSERT INTO subjects (subject_id, subject_name, teacher_id) VALUES (?, ?, ?)', subjects)
-
-# Students
-students = []
-for i in range(1, 51):
-    students.append((i, fake.name(), random.randint(1, 3)))
-cursor.executemany('INSERT INTO students (student_id, student_name, group_id) VALUES (?, ?, ?)', students)
-
-# Grades
-grades = []
-grade_id = 1
-for student_id in range(1, 51):
-    for _ in range(random.randint(15, 20)):
-        subject_id = random.randint(1, 6)
-        grade = random.randint(60, 100)
-        date_received = fake.date_between(start_date='-1y', end_date='today')
-        grades.append((grade_id, student_id, subject_id, grade, date_received))
-        grade_id += 1
-cursor.executemany('INSERT INTO grades (grade_id, student_id, subject_id, grade, date_received) VALUES (?, ?, ?, ?, ?)', grades)
-
-# Commit and close
-conn.commit()
-conn.close()
-
-print("Database created and populated successfully!")
-
-# --- QUERY FILE GENERATION SECTION ---
-# After running once to create query files, comment out or delete this section
-# to prevent overwriting files on subsequent runs.
-
-queries = {
+'''
+
+# Children first, so a re-run can clear the tables in FK order
+TABLES = ('grades', 'subjects', 'students', 'teachers', 'groups')
+
+# Ids are named parameters (:subject_id, :group_id, :teacher_id, :student_id), bound by main2.py
+QUERIES = {
     "query_1.sql": """
 SELECT s.student_name, ROUND(AVG(g.grade), 2) as avg_grade
 FROM students s
@@ -101,7 +72,7 @@ LIMIT 5;
 SELECT s.student_name, ROUND(AVG(g.grade), 2) as avg_grade
 FROM students s
 JOIN grades g ON s.student_id = g.student_id
-WHERE g.subject_id = 1
+WHERE g.subject_id = :subject_id
 GROUP BY s.student_id, s.student_name
 ORDER BY avg_grade DESC
 LIMIT 1;
@@ -111,7 +82,7 @@ SELECT gr.group_name, ROUND(AVG(g.grade), 2) as avg_grade
 FROM groups gr
 JOIN students s ON gr.group_id = s.group_id
 JOIN grades g ON s.student_id = g.student_id
-WHERE g.subject_id = 1
+WHERE g.subject_id = :subject_id
 GROUP BY gr.group_id, gr.group_name;
 """,
     "query_4.sql": """
@@ -121,62 +92,172 @@ FROM grades;
     "query_5.sql": """
 SELECT sub.subject_name
 FROM subjects sub
-WHERE sub.teacher_id = 1;
+WHERE sub.teacher_id = :teacher_id;
 """,
     "query_6.sql": """
 SELECT s.student_name
 FROM students s
-WHERE s.group_id = 1;
+WHERE s.group_id = :group_id;
 """,
     "query_7.sql": """
 SELECT s.student_name, g.grade
 FROM students s
 JOIN grades g ON s.student_id = g.student_id
-WHERE s.group_id = 1 AND g.subject_id = 1;
+WHERE s.group_id = :group_id AND g.subject_id = :subject_id;
 """,
     "query_8.sql": """
 SELECT ROUND(AVG(g.grade), 2) as avg_grade
 FROM grades g
 JOIN subjects sub ON g.subject_id = sub.subject_id
-WHERE sub.teacher_id = 1;
+WHERE sub.teacher_id = :teacher_id;
 """,
     "query_9.sql": """
 SELECT DISTINCT sub.subject_name
 FROM subjects sub
 JOIN grades g ON sub.subject_id = g.subject_id
-WHERE g.student_id = 1;
+WHERE g.student_id = :student_id;
 """,
     "query_10.sql": """
 SELECT sub.subject_name
 FROM subjects sub
 JOIN grades g ON sub.subject_id = g.subject_id
-WHERE g.student_id = 1 AND sub.teacher_id = 1;
+WHERE g.student_id = :student_id AND sub.teacher_id = :teacher_id;
 """,
     "query_11.sql": """
 SELECT ROUND(AVG(g.grade), 2) as avg_grade
 FROM grades g
 JOIN subjects sub ON g.subject_id = sub.subject_id
-WHERE g.student_id = 1 AND sub.teacher_id = 1;
+WHERE g.student_id = :student_id AND sub.teacher_id = :teacher_id;
 """,
     "query_12.sql": """
 SELECT s.student_name, g.grade
 FROM students s
 JOIN grades g ON s.student_id = g.student_id
-WHERE s.group_id = 1 AND g.subject_id = 1
+WHERE s.group_id = :group_id AND g.subject_id = :subject_id
 AND g.date_received = (
     SELECT MAX(date_received)
     FROM grades g2
-    WHERE g2.subject_id = 1 AND g2.student_id IN (
-        SELECT student_id FROM students WHERE group_id = 1
+    WHERE g2.subject_id = :subject_id AND g2.student_id IN (
+        SELECT student_id FROM students WHERE group_id = :group_id
     )
 );
 """
 }
 
-for filename, query in queries.items():
-    with open(filename, 'w') as f:
-        f.write(query.strip())
 
-print("Query files created successfully!")
+def connect(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    # WAL survives the connection, so readers are not blocked by later writes
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def create_schema(conn):
+    conn.executescript(SCHEMA)
+
+
+def generate_grades(rng, students, subjects, per_student, dates):
+    """Yield grade rows one at a time; nothing is collected in memory."""
+    low, high = per_student
+    subject_ids = range(1, subjects + 1)
+    grade_values = range(GRADE_RANGE[0], GRADE_RANGE[1] + 1)
+    grade_id = 1
+    for student_id in range(1, students + 1):
+        # choices(k=...) draws a student's whole batch at once, far cheaper than randint per column
+        count = rng.randint(low, high)
+        for subject_id, grade, date_received in zip(rng.choices(subject_ids, k=count),
+                                                    rng.choices(grade_values, k=count),
+                                                    rng.choices(dates, k=count)):
+            yield grade_id, student_id, subject_id, grade, date_received
+            grade_id += 1
+
+
+def insert_chunked(conn, sql, rows, chunk_size=CHUNK_SIZE):
+    total = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return total
+        conn.executemany(sql, chunk)
+        total += len(chunk)
+
+
+def seed(conn, groups=GROUPS, teachers=TEACHERS, subjects=SUBJECTS, students=STUDENTS,
+         per_student=GRADES_PER_STUDENT, seed_value=0, chunk_size=CHUNK_SIZE):
+    """Replace the contents of all tables with a deterministic data set.
+
+    Everything runs in one transaction with synchronous=OFF, so re-running
+    never collides on primary keys. Aggregate triggers, if installed, are
+    suspended for the load and the stats rebuilt once at the end. The same seed gives the same rows
+    (dates are relative to today, as before).
+    """
+    rng = random.Random(seed_value)
+    fake = Faker()
+    fake.seed_instance(seed_value)
+    # Faker is slow per call, so large runs draw names from a fixed pool
+    names = [fake.name() for _ in range(min(students + teachers, NAME_POOL_SIZE))]
+    today = date.today()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(366)]
+
+    conn.execute('PRAGMA synchronous=OFF')
+    try:
+        with aggregates.bulk_load(conn), conn:
+            for table in TABLES:
+                conn.execute(f'DELETE FROM {table}')
+            conn.executemany('INSERT INTO groups (group_id, group_name) VALUES (?, ?)',
+                             [(i, f'Group-{chr(64 + i)}') for i in range(1, groups + 1)])
+            conn.executemany('INSERT INTO teachers (teacher_id, teacher_name) VALUES (?, ?)',
+                             [(i, rng.choice(names)) for i in range(1, teachers + 1)])
+            conn.executemany('INSERT INTO subjects (subject_id, subject_name, teacher_id) VALUES (?, ?, ?)',
+                             [(i, fake.word().capitalize() + " Studies", rng.randint(1, teachers))
+                              for i in range(1, subjects + 1)])
+            insert_chunked(conn, 'INSERT INTO students (student_id, student_name, group_id) VALUES (?, ?, ?)',
+                           ((i, rng.choice(names), rng.randint(1, groups)) for i in range(1, students + 1)),
+                           chunk_size)
+            return insert_chunked(
+                conn,
+                'INSERT INTO grades (grade_id, student_id, subject_id, grade, date_received) VALUES (?, ?, ?, ?, ?)',
+                generate_grades(rng, students, subjects, per_student, dates),
+                chunk_size,
+            )
+    finally:
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+
+def write_query_files(directory='.'):
+    for filename, query in QUERIES.items():
+        with open(f'{directory}/{filename}', 'w') as f:
+            f.write(query.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and populate the university database.")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--students', type=int, default=STUDENTS)
+    parser.add_argument('--grades-per-student', type=int, nargs=2, default=GRADES_PER_STUDENT,
+                        metavar=('MIN', 'MAX'))
+    parser.add_argument('--groups', type=int, default=GROUPS)
+    parser.add_argument('--teachers', type=int, default=TEACHERS)
+    parser.add_argument('--subjects', type=int, default=SUBJECTS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--no-queries', action='store_true', help="don't (re)write the query_N.sql files")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    create_schema(conn)
+    start = time.perf_counter()
+    count = seed(conn, args.groups, args.teachers, args.subjects, args.students,
+                 tuple(args.grades_per_student), args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    print(f"Database created and populated successfully! "
+          f"{args.students} students, {count} grades in {elapsed:.2f}s")
+
+    if not args.no_queries:
+        write_query_files()
+        print("Query files created successfully!")
+
 
-# --- END QUERY FILE GENERATION SECTION ---
\ No newline at end of file
+if __name__ == '__main__':
+    main()
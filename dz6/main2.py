@@ -1,8 +1,143 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import re
 import sqlite3
-conn = sqlite3.connect('university.db')
-cursor = conn.cursor()
-with open('query_1.sql', 'r') as f:
-    sql = f.read()
-cursor.execute(sql)
-print(cursor.fetchall())
-conn.close()
\ No newline at end of file
+import statistics
+import sys
+import time
+from urllib.request import pathname2url
+
+DB_FILE = 'university.db'
+DEFAULT_PARAMS = {"subject_id": 1, "group_id": 1, "teacher_id": 1, "student_id": 1}
+CACHED_STATEMENTS = 64
+
+PARAM_RE = re.compile(r':(\w+)')
+
+
+def load_queries(directory='.'):
+    """{N: sql} for every query_N.sql in directory, in numeric order."""
+    queries = {}
+    for path in glob.glob(os.path.join(directory, 'query_*.sql')):
+        match = re.fullmatch(r'query_(\d+)\.sql', os.path.basename(path))
+        if match:
+            with open(path, 'r') as f:
+                queries[int(match.group(1))] = f.read()
+    return dict(sorted(queries.items()))
+
+
+def parse_param(text):
+    name, sep, value = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected name=value, got {text!r}")
+    try:
+        return name, int(value)
+    except ValueError:
+        return name, value
+
+
+class QueryRunner:
+    """Runs the query_N.sql files on one persistent connection.
+
+    The SQL text of each file is read once and reused verbatim, so sqlite3's
+    statement cache keeps every query prepared between runs. Ids are bound
+    as named parameters from DEFAULT_PARAMS, overridable per runner or per call.
+    overrides ({N: sql}) replaces individual queries, e.g. aggregates.AGGREGATE_QUERIES.
+    A read_only runner opens the database with mode=ro and may be used from
+    the thread that did not create it.
+    """
+
+    def __init__(self, db_file=DB_FILE, queries_dir='.', params=None, cached_statements=CACHED_STATEMENTS,
+                 overrides=None, read_only=False):
+        self.queries = load_queries(queries_dir)
+        self.queries.update(overrides or {})
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        if read_only:
+            self.conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(db_file))}?mode=ro', uri=True,
+                                        cached_statements=cached_statements, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(db_file, cached_statements=cached_statements)
+
+    def bind(self, number, params=None):
+        values = {**self.params, **(params or {})}
+        return {name: values[name] for name in PARAM_RE.findall(self.queries[number])}
+
+    def run(self, number, params=None):
+        cursor = self.conn.execute(self.queries[number], self.bind(number, params))
+        rows = cursor.fetchall()
+        return [column[0] for column in cursor.description], rows
+
+    def time(self, number, repeat=1, params=None):
+        sql, bound = self.queries[number], self.bind(number, params)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.conn.execute(sql, bound).fetchall()
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_results(results, fmt, out=sys.stdout):
+    if fmt == 'json':
+        json.dump({f"query_{number}": [dict(zip(columns, row)) for row in rows]
+                   for number, (columns, rows) in results.items()}, out, ensure_ascii=False, indent=2)
+        out.write('\n')
+    elif fmt == 'csv':
+        writer = csv.writer(out)
+        for number, (columns, rows) in results.items():
+            if len(results) > 1:
+                out.write(f"# query_{number}\n")
+            writer.writerow(columns)
+            writer.writerows(rows)
+    else:
+        for number, (columns, rows) in results.items():
+            if len(results) > 1:
+                print(f"query_{number}:", file=out)
+            print(rows, file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the query_N.sql files against the university database.")
+    parser.add_argument('numbers', nargs='*', type=int, help="query numbers to run (default: all)")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--queries', default='.', help="directory with query_N.sql files")
+    parser.add_argument('--param', action='append', type=parse_param, default=[], metavar='NAME=VALUE',
+                        help=f"override a query parameter (defaults: {DEFAULT_PARAMS})")
+    parser.add_argument('--repeat', type=int, default=1, help="run each query N times and report timings")
+    parser.add_argument('--format', choices=('raw', 'csv', 'json'), default='raw')
+    parser.add_argument('--aggregates', action='store_true',
+                        help="answer average queries from the tables maintained by aggregates.py")
+    args = parser.parse_args()
+
+    overrides = None
+    if args.aggregates:
+        from aggregates import AGGREGATE_QUERIES  # aggregates imports this module
+        overrides = AGGREGATE_QUERIES
+    with QueryRunner(args.db, args.queries, dict(args.param), overrides=overrides) as runner:
+        if not runner.queries:
+            parser.error(f"no query_N.sql files in {args.queries}")
+        numbers = args.numbers or list(runner.queries)
+        unknown = [number for number in numbers if number not in runner.queries]
+        if unknown:
+            parser.error(f"no query file for {unknown}")
+        write_results({number: runner.run(number) for number in numbers}, args.format)
+        if args.repeat > 1:
+            for number in numbers:
+                timings = [t * 1000 for t in runner.time(number, args.repeat)]
+                print(f"query_{number}: min {min(timings):.3f} ms, mean {statistics.mean(timings):.3f} ms, "
+                      f"max {max(timings):.3f} ms over {args.repeat} runs", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from main2 import DB_FILE, QueryRunner, load_queries, parse_param
+
+WORKERS = min(os.cpu_count() or 1, 8)
+
+_process_runner = None
+
+
+def timed_run(runner, number):
+    start = time.perf_counter()
+    columns, rows = runner.run(number)
+    return number, columns, rows, time.perf_counter() - start
+
+
+def _init_process(config):
+    # Each ParallelRunner has its own process pool, so a worker process only ever serves one config
+    global _process_runner
+    _process_runner = QueryRunner(read_only=True, **config)
+
+
+def _run_in_process(number):
+    return timed_run(_process_runner, number)
+
+
+class ParallelRunner:
+    """Runs independent query_N.sql files concurrently over read-only connections.
+
+    The database must be in WAL mode (main.py sets it), so readers never wait
+    on each other or on a writer. sqlite3 releases the GIL while a statement
+    runs, so threads are enough; processes=True uses a process pool instead.
+    Every worker keeps one connection across refreshes; close() closes only
+    this runner's connections.
+    """
+
+    def __init__(self, db_file=DB_FILE, queries_dir='.', params=None, overrides=None,
+                 workers=WORKERS, processes=False):
+        self.config = {"db_file": db_file, "queries_dir": queries_dir, "params": params, "overrides": overrides}
+        self.numbers = list({**load_queries(queries_dir), **(overrides or {})})
+        self.runners = {}
+        self.runners_lock = threading.Lock()
+        if processes:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(self.config,))
+            self.task = _run_in_process
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+            self.task = self.run_in_thread
+
+    def run_in_thread(self, number):
+        thread = threading.get_ident()
+        runner = self.runners.get(thread)
+        if runner is None:
+            runner = QueryRunner(read_only=True, **self.config)
+            with self.runners_lock:
+                self.runners[thread] = runner
+        return timed_run(runner, number)
+
+    def refresh(self, numbers=None):
+        """Run the queries once; returns ({N: {"columns", "rows", "seconds"}}, wall seconds)."""
+        start = time.perf_counter()
+        futures = [self.pool.submit(self.task, number) for number in numbers or self.numbers]
+        results = {}
+        for future in as_completed(futures):
+            number, columns, rows, seconds = future.result()
+            results[number] = {"columns": columns, "rows": rows, "seconds": seconds}
+        wall = time.perf_counter() - start
+        return dict(sorted(results.items())), wall
+
+    def close(self):
+        self.pool.shutdown()
+        with self.runners_lock:
+            for runner in self.runners.values():
+                runner.close()
+            self.runners.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sequential_refresh(config, numbers):
+    """The back-to-back baseline: every query on one connection."""
+    with QueryRunner(**config) as runner:
+        start = time.perf_counter()
+        for number in numbers:
+            runner.run(number)
+        return time.perf_counter() - start
+
+
+def report(results, wall, sequential=None):
+    total = sum(result["seconds"] for result in results.values())
+    slowest = max(results, key=lambda number: results[number]["seconds"])
+    summary = {
+        "queries": {f"query_{number}": {"ms": round(result["seconds"] * 1000, 3), "rows": len(result["rows"])}
+                    for number, result in results.items()},
+        "wall_ms": round(wall * 1000, 3),
+        "sum_of_queries_ms": round(total * 1000, 3),
+        "slowest": f"query_{slowest}",
+        "slowest_ms": round(results[slowest]["seconds"] * 1000, 3),
+    }
+    if sequential is not None:
+        summary["sequential_ms"] = round(sequential * 1000, 3)
+        summary["speedup"] = round(sequential / wall, 2)
+    return summary
+
+
+def print_report(summary, out=sys.stdout):
+    for name, query in summary["queries"].items():
+        print(f"{name:<10}{query['ms']:>12.3f} ms{query['rows']:>10} rows", file=out)
+    print(f"wall {summary['wall_ms']:.3f} ms, sum of queries {summary['sum_of_queries_ms']:.3f} ms, "
+          f"slowest {summary['slowest']} {summary['slowest_ms']:.3f} ms", file=out)
+    if "sequential_ms" in summary:
+        print(f"sequential {summary['sequential_ms']:.3f} ms, speedup {summary['speedup']}x", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the query_N.sql files concurrently on read-only connections.")
+    parser.add_argument('numbers', nargs='*', type=int, help="query numbers to run (default: all)")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--queries', default='.', help="directory with query_N.sql files")
+    parser.add_argument('--param', action='append', type=parse_param, default=[], metavar='NAME=VALUE')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--processes', action='store_true', help="use a process pool instead of threads")
+    parser.add_argument('--aggregates', action='store_true',
+                        help="answer average queries from the tables maintained by aggregates.py")
+    parser.add_argument('--repeat', type=int, default=1, help="refresh N times, report the fastest")
+    parser.add_argument('--compare', action='store_true', help="also time the queries back to back on one connection")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    overrides = None
+    if args.aggregates:
+        from aggregates import AGGREGATE_QUERIES
+        overrides = AGGREGATE_QUERIES
+    with ParallelRunner(args.db, args.queries, dict(args.param), overrides, args.workers, args.processes) as runner:
+        if not runner.numbers:
+            parser.error(f"no query_N.sql files in {args.queries}")
+        numbers = args.numbers or runner.numbers
+        unknown = [number for number in numbers if number not in runner.numbers]
+        if unknown:
+            parser.error(f"no query file for {unknown}")
+        results, wall = min((runner.refresh(numbers) for _ in range(args.repeat)), key=lambda refresh: refresh[1])
+        sequential = None
+        if args.compare:
+            sequential = min(sequential_refresh(runner.config, numbers) for _ in range(args.repeat))
+
+    summary = report(results, wall, sequential)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,354 @@
+import sys
 import time
-from multiprocessing import Pool, cpu_count
+import sqlite3
+import argparse
+import threading
+from array import array
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import compress
+from math import isqrt
+from multiprocessing import Array, Pool, Value, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
 
-def factorize_number(n):
-    factors = []
-    for i in range(1, int(n**0.5) + 1):
+CACHE_SIZE = 4096
+SIEVE_LIMIT = 1 << 16
+SEGMENT_SIZE = 1 << 15
+DISK_BATCH_SIZE = 512
+DISK_FLUSH_INTERVAL = 1.0
+
+_primes = None
+_primes_shm = None
+
+_disk_cache = None
+_disk_stats = {"hits": 0, "misses": 0}
+
+# Лічильники кешу з процесів пулу: кожен воркер пише свої у власний слот спільного масиву
+_STAT_FIELDS = 4
+_worker_slot = None
+_worker_totals = {"hits": 0, "misses": 0, "disk_hits": 0, "disk_misses": 0}
+
+
+class DiskCache:
+    """SQLite file with known divisors, shared by all worker processes.
+
+    New entries are buffered and written in one transaction every batch_size
+    puts or flush_interval seconds, so workers don't queue on the write lock
+    for every number. close() writes whatever is still buffered.
+    """
+
+    def __init__(self, path, batch_size=DISK_BATCH_SIZE, flush_interval=DISK_FLUSH_INTERVAL):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS divisors (n INTEGER PRIMARY KEY, factors TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def get(self, n):
+        factors = self.pending.get(n)
+        if factors is not None:
+            return factors
+        row = self.conn.execute("SELECT factors FROM divisors WHERE n = ?", (n,)).fetchone()
+        if row is None:
+            return None
+        return tuple(int(x) for x in row[0].split(","))
+
+    def put(self, n, factors):
+        self.pending[n] = factors
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO divisors (n, factors) VALUES (?, ?)",
+                    ((n, ",".join(map(str, factors))) for n, factors in self.pending.items()),
+                )
+            self.pending.clear()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def enable_disk_cache(path):
+    global _disk_cache
+    disable_disk_cache()
+    _disk_cache = DiskCache(path)
+
+
+def disable_disk_cache():
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+        _disk_cache = None
+
+
+def simple_sieve(limit):
+    if limit < 2:
+        return array("Q")
+    flags = bytearray([1]) * (limit + 1)
+    flags[0] = flags[1] = 0
+    for p in range(2, isqrt(limit) + 1):
+        if flags[p]:
+            flags[p * p::p] = bytes(len(range(p * p, limit + 1, p)))
+    return array("Q", compress(range(limit + 1), flags))
+
+
+def segmented_sieve(limit, segment_size=SEGMENT_SIZE):
+    root = isqrt(limit)
+    base = simple_sieve(root)
+    primes = array("Q", base)
+    for low in range(root + 1, limit + 1, segment_size):
+        high = min(low + segment_size - 1, limit)
+        flags = bytearray([1]) * (high - low + 1)
+        for p in base:
+            if p * p > high:
+                break
+            start = max(p * p, -(-low // p) * p)
+            flags[start - low::p] = bytes(len(range(start, high + 1, p)))
+        primes.extend(compress(range(low, high + 1), flags))
+    return primes
+
+
+def prepare_sieve(limit=SIEVE_LIMIT):
+    global _primes
+    _primes = segmented_sieve(limit)
+    return _primes
+
+
+def _get_primes():
+    if _primes is None:
+        prepare_sieve()
+    return _primes
+
+
+@contextmanager
+def _shared_primes():
+    """Copy the sieve into shared memory once instead of pickling it to every worker."""
+    primes = _get_primes()
+    shm = SharedMemory(create=True, size=max(len(primes) * primes.itemsize, 1))
+    try:
+        shm.buf[:len(primes) * primes.itemsize] = primes.tobytes()
+        yield shm.name, len(primes)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _attach_primes(name, count):
+    global _primes, _primes_shm
+    _primes_shm = SharedMemory(name=name)
+    _primes = _primes_shm.buf.cast("Q")[:count]
+
+
+def smallest_prime_factor(n):
+    primes = _get_primes()
+    for p in primes:
+        if p * p > n:
+            return n
+        if n % p == 0:
+            return p
+    if n % 2 == 0:
+        return 2
+    # Решету не вистачило простих чисел — далі перебираємо непарні числа
+    i = (primes[-1] + 1 if primes else 3) | 1
+    while i * i <= n:
         if n % i == 0:
-            factors.append(i)
-            if i != n // i:
-                factors.append(n // i)
-    return sorted(factors)
+            return i
+        i += 2
+    return n
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _divisors(n):
+    if n == 1:
+        return (1,)
+    # D(p * m) = D(m) ∪ p * D(m), тож дільники n будуються з уже відомих дільників n // p
+    p = smallest_prime_factor(n)
+    rest = _divisors(n // p)
+    return tuple(sorted(set(rest).union(p * d for d in rest)))
+
+
+def factorize_number(n):
+    if n < 1:
+        if n == 0:
+            return []  # як і раніше: у нуля немає скінченного списку дільників
+        raise ValueError(f"factorize_number expects a non-negative integer, got {n}")
+    if _disk_cache is None:
+        return list(_divisors(n))
+    factors = _disk_cache.get(n)
+    if factors is not None:
+        _disk_stats["hits"] += 1
+        return list(factors)
+    _disk_stats["misses"] += 1
+    factors = _divisors(n)
+    _disk_cache.put(n, factors)
+    return list(factors)
+
+
+def _rates(hits, misses, disk_hits, disk_misses):
+    lookups = hits + misses
+    disk_lookups = disk_hits + disk_misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "disk_hits": disk_hits,
+        "disk_misses": disk_misses,
+        "disk_hit_rate": disk_hits / disk_lookups if disk_lookups else 0.0,
+    }
+
+
+def cache_info():
+    """Cache counters of this process only."""
+    info = _divisors.cache_info()
+    return {
+        **_rates(info.hits, info.misses, _disk_stats["hits"], _disk_stats["misses"]),
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+def worker_cache_info():
+    """Cache counters summed over the pool workers of all parallel and stream runs so far."""
+    return _rates(**_worker_totals)
+
+
+def cache_clear():
+    _divisors.cache_clear()
+    _disk_stats["hits"] = _disk_stats["misses"] = 0
+    for key in _worker_totals:
+        _worker_totals[key] = 0
+
+
+def _init_worker(cache_path, primes_name, primes_count, stats, next_slot):
+    global _worker_slot
+    _attach_primes(primes_name, primes_count)
+    # Після fork воркер успадковує лічильники батьківського процесу — починаємо з нуля
+    cache_clear()
+    with next_slot.get_lock():
+        offset = next_slot.value * _STAT_FIELDS
+        next_slot.value += 1
+    if offset < len(stats):
+        _worker_slot = (stats, offset)
+    if cache_path is not None:
+        enable_disk_cache(cache_path)
+        # Пул закривається через close()/join(), тож воркер встигає дописати буфер кешу
+        Finalize(None, disable_disk_cache, exitpriority=10)
+
+
+def _publish_stats():
+    if _worker_slot is None:
+        return
+    stats, offset = _worker_slot
+    info = _divisors.cache_info()
+    stats[offset:offset + _STAT_FIELDS] = [info.hits, info.misses, _disk_stats["hits"], _disk_stats["misses"]]
+
+
+@contextmanager
+def _worker_pool(workers, cache_path):
+    stats = Array("q", workers * _STAT_FIELDS, lock=False)
+    next_slot = Value("i", 0)
+    with _shared_primes() as sieve, \
+            Pool(workers, initializer=_init_worker, initargs=(cache_path, *sieve, stats, next_slot)) as pool:
+        try:
+            yield pool
+        finally:
+            for i, key in enumerate(_worker_totals):
+                _worker_totals[key] += sum(stats[i::_STAT_FIELDS])
+
 
 def factorize_sync(*numbers):
     return [factorize_number(n) for n in numbers]
 
-def factorize_parallel(*numbers):
-    with Pool(cpu_count()) as pool:
-        results = pool.map(factorize_number, numbers)
+def _factorize_task(n):
+    factors = factorize_number(n)
+    _publish_stats()
+    return factors
+
+
+def factorize_parallel(*numbers, cache_path=None, workers=None):
+    with _worker_pool(workers or cpu_count(), cache_path) as pool:
+        results = pool.map(_factorize_task, numbers)
+        pool.close()
+        pool.join()
     return results
 
-def main():
+
+def _factorize_pair(n):
+    return n, _factorize_task(n)
+
+
+def read_numbers(lines):
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            n = int(line)
+        except ValueError:
+            print(f"Skipping line {line_no}: {line!r} is not an integer", file=sys.stderr)
+            continue
+        if n < 1:
+            print(f"Skipping line {line_no}: {n} is not a positive integer", file=sys.stderr)
+            continue
+        yield n
+
+
+def factorize_stream(numbers, workers=None, max_in_flight=None, chunksize=64, cache_path=None):
+    """Yield (n, divisors) pairs as soon as they are ready, in completion order.
+
+    Pool.imap_unordered drains its input eagerly, so the input is gated by a
+    semaphore: at most max_in_flight numbers are queued or being processed.
+    """
+    workers = workers or cpu_count()
+    max_in_flight = max(max_in_flight or workers * chunksize * 4, chunksize)
+    slots = threading.BoundedSemaphore(max_in_flight)
+
+    def gated(source):
+        for n in source:
+            slots.acquire()
+            yield n
+
+    with _worker_pool(workers, cache_path) as pool:
+        for result in pool.imap_unordered(_factorize_pair, gated(numbers), chunksize):
+            slots.release()
+            yield result
+        pool.close()
+        pool.join()
+
+
+def stream(args):
+    source = sys.stdin if args.input == "-" else open(args.input, "r")
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        results = factorize_stream(
+            read_numbers(source),
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            chunksize=args.chunksize,
+            cache_path=args.cache,
+        )
+        for n, factors in results:
+            target.write(f"{n}: {' '.join(map(str, factors))}\n")
+        print(f"Cache (workers): {worker_cache_info()}", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+def demo():
     nums = (128, 255, 99999, 10651060)
 
     start = time.perf_counter()
@@ -38,7 +368,26 @@ def main():
     assert c == [1, 3, 9, 41, 123, 271, 369, 813, 2439, 11111, 33333, 99999]
     assert d == [1, 2, 4, 5, 7, 10, 14, 20, 28, 35, 70, 140, 76079, 152158, 304316,
                  380395, 532553, 760790, 1065106, 1521580, 2130212, 2662765, 5325530, 10651060]
+    assert sync_results == parallel_results
     print("All assertions passed.")
+    print(f"Cache (this process): {cache_info()}")
+    print(f"Cache (workers): {worker_cache_info()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Factorise numbers in parallel.")
+    parser.add_argument("input", nargs="?", help="file with one number per line, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--cache", default=None, help="path to a shared SQLite cache")
+    args = parser.parse_args()
+
+    if args.input is None:
+        demo()
+    else:
+        stream(args)
 
 if __name__ == "__main__":
     main()
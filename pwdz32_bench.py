@@ -0,0 +1,171 @@
+import sys
+import json
+import math
+import random
+import argparse
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from multiprocessing import cpu_count
+
+import pwdz32
+
+SIEVE_SIZES = (0, 1 << 10, 1 << 14, 1 << 16, 1 << 20, 1 << 24)
+MAGNITUDES = (10 ** 6, 10 ** 9, 10 ** 12)
+COUNTS = (4, 64, 1024)
+
+
+def sample_numbers(magnitude, count, seed=0):
+    rng = random.Random(seed)
+    return [rng.randrange(magnitude // 10, magnitude) for _ in range(count)]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def summarize(samples):
+    return {
+        "mean_s": statistics.fmean(samples),
+        "p95_s": percentile(samples, 0.95),
+        "min_s": min(samples),
+    }
+
+
+def measure(func, numbers, repeats, warmup):
+    for _ in range(warmup):
+        pwdz32.cache_clear()
+        func(numbers)
+    samples = []
+    for _ in range(repeats):
+        pwdz32.cache_clear()
+        start = time.perf_counter()
+        func(numbers)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def worker_counts():
+    counts, n = [], 1
+    while n < cpu_count():
+        counts.append(n)
+        n *= 2
+    return counts + [cpu_count()]
+
+
+def bench_scaling(counts=COUNTS, magnitudes=MAGNITUDES, workers=None, repeats=5, warmup=1):
+    """Sweep input count x magnitude x worker count, comparing against the sync run."""
+    workers = workers or worker_counts()
+    rows = []
+    for magnitude in magnitudes:
+        for count in counts:
+            numbers = sample_numbers(magnitude, count)
+            sync = measure(lambda nums: pwdz32.factorize_sync(*nums), numbers, repeats, warmup)
+            for n_workers in workers:
+                parallel = measure(
+                    lambda nums: pwdz32.factorize_parallel(*nums, workers=n_workers),
+                    numbers, repeats, warmup,
+                )
+                speedup = sync["mean_s"] / parallel["mean_s"]
+                rows.append({
+                    "magnitude": magnitude,
+                    "count": count,
+                    "workers": n_workers,
+                    "sync": sync,
+                    "parallel": parallel,
+                    "speedup": speedup,
+                    "efficiency": speedup / n_workers,
+                })
+    return rows
+
+
+def print_scaling_table(rows):
+    print(f"{'magnitude':>14} {'count':>6} {'workers':>7} {'sync mean':>10} {'sync p95':>10} "
+          f"{'par mean':>10} {'par p95':>10} {'speedup':>8} {'eff':>6}")
+    for row in rows:
+        sync, parallel = row["sync"], row["parallel"]
+        print(f"{row['magnitude']:>14} {row['count']:>6} {row['workers']:>7} "
+              f"{sync['mean_s']:>10.4f} {sync['p95_s']:>10.4f} "
+              f"{parallel['mean_s']:>10.4f} {parallel['p95_s']:>10.4f} "
+              f"{row['speedup']:>7.2f}x {row['efficiency']:>6.2f}")
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": cpu_count(),
+        "sieve_limit": pwdz32.SIEVE_LIMIT,
+    }
+
+
+def time_factorize(numbers):
+    pwdz32.cache_clear()
+    start = time.perf_counter()
+    pwdz32.factorize_sync(*numbers)
+    return time.perf_counter() - start
+
+
+def bench_sieve(sizes=SIEVE_SIZES, magnitudes=MAGNITUDES, count=200):
+    rows = []
+    for magnitude in magnitudes:
+        numbers = sample_numbers(magnitude, count)
+        baseline = None
+        for size in sizes:
+            start = time.perf_counter()
+            primes = pwdz32.prepare_sieve(size)
+            build = time.perf_counter() - start
+            elapsed = time_factorize(numbers)
+            baseline = baseline or elapsed
+            rows.append({
+                "magnitude": magnitude,
+                "sieve_size": size,
+                "primes": len(primes),
+                "build_s": build,
+                "factorize_s": elapsed,
+                "speedup": baseline / elapsed,
+            })
+    pwdz32.prepare_sieve()
+    return rows
+
+
+def print_sieve_table(rows):
+    print(f"{'magnitude':>14} {'sieve':>10} {'primes':>9} {'build, s':>10} {'factorize, s':>13} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['magnitude']:>14} {row['sieve_size']:>10} {row['primes']:>9} "
+              f"{row['build_s']:>10.4f} {row['factorize_s']:>13.4f} {row['speedup']:>7.2f}x")
+
+
+def int_list(value):
+    return [int(float(x)) for x in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for pwdz32.")
+    parser.add_argument("suite", nargs="?", choices=("scaling", "sieve"), default="scaling")
+    parser.add_argument("--counts", type=int_list, default=list(COUNTS), help="e.g. 4,64,1024")
+    parser.add_argument("--magnitudes", type=int_list, default=list(MAGNITUDES), help="e.g. 1e6,1e9")
+    parser.add_argument("--workers", type=int_list, default=None, help="e.g. 1,2,4")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--count", type=int, default=200, help="numbers per magnitude for the sieve suite")
+    parser.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.suite == "sieve":
+        rows = bench_sieve(magnitudes=args.magnitudes, count=args.count)
+        print_sieve_table(rows)
+    else:
+        rows = bench_scaling(args.counts, args.magnitudes, args.workers, args.repeats, args.warmup)
+        print_scaling_table(rows)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"suite": args.suite, "environment": environment(), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()